@@ -0,0 +1,166 @@
+"""Play many headless games in parallel to tune the game's balance settings.
+
+Every combination of seed, parameter value and placement policy becomes
+one job. Jobs run across a process pool and each result is appended to
+the output file as one JSON line as soon as it finishes:
+    python batch.py --seeds 20 --tower-cost 30,50,70 --policy front,spread --out results.jsonl
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# settings.json key for each tunable parameter
+PARAMETERS = {
+    'tower_cost': int,
+    'object_speed': float,
+    'object_spawn_rate': int,
+}
+
+class SlotPolicy:
+    """Buy a tower as soon as one is affordable, at the next free candidate slot."""
+    def __init__(self, order):
+        self.order = order
+        self.slots = None
+
+    def candidate_slots(self, world):
+        layout = world.layout
+        size = layout.tower_size
+        width = layout.size[0]
+        above = layout.road_y - size
+        below = layout.road_y + layout.road_height + size
+        xs = list(range(size, width - size // 2, size * 2))
+        if self.order == 'front':
+            # Cluster towers where enemies enter
+            xs.sort()
+        elif self.order == 'back':
+            # Defend the exit first
+            xs.sort(reverse=True)
+        else:
+            # Spread: fill every other slot first, then the gaps
+            xs = xs[::2] + xs[1::2]
+        return [(x, y) for x in xs for y in (above, below)]
+
+    def __call__(self, world):
+        if world.balance < world.config.tower_cost:
+            return
+        if self.slots is None:
+            self.slots = self.candidate_slots(world)
+        while self.slots:
+            if world.place_tower(self.slots.pop(0)) is not None:
+                return
+
+class NoTowers:
+    """Baseline: never build anything."""
+    def __call__(self, world):
+        pass
+
+POLICIES = {
+    'none': NoTowers,
+    'front': lambda: SlotPolicy('front'),
+    'back': lambda: SlotPolicy('back'),
+    'spread': lambda: SlotPolicy('spread'),
+}
+
+def init_worker():
+    from simulation import init_headless
+    init_headless()
+
+def run_job(job):
+    """Play one game and return its result dict. Runs inside a worker process."""
+    from config import get_config
+    from simulation import create_world
+
+    config = get_config()
+    config.override({'game': job['params']})
+    world = create_world(job['seed'], job.get('enemy_storage'))
+    policy = POLICIES[job['policy']]()
+    sample_every = job['sample_every']
+
+    balance_curve = []
+    start = time.perf_counter()
+    game_over = False
+    while world.tick < job['ticks'] and not game_over:
+        policy(world)
+        game_over = world.update()
+        if world.tick % sample_every == 0:
+            balance_curve.append(world.balance)
+
+    return {
+        'seed': job['seed'],
+        'params': job['params'],
+        'policy': job['policy'],
+        'survived': not game_over,
+        'survival_ticks': world.tick,
+        'leaks': config.starting_health - world.health,
+        'towers': len(world.towers),
+        'balance': world.balance,
+        'balance_curve': balance_curve,
+        'seconds': time.perf_counter() - start,
+    }
+
+def build_jobs(args):
+    values = {name: getattr(args, name) for name in PARAMETERS if getattr(args, name)}
+    jobs = []
+    for combo in itertools.product(*values.values()):
+        params = dict(zip(values, combo))
+        for policy in args.policy:
+            for seed in range(args.first_seed, args.first_seed + args.seeds):
+                jobs.append({
+                    'seed': seed,
+                    'params': params,
+                    'policy': policy,
+                    'ticks': args.ticks,
+                    'sample_every': args.sample_every,
+                    'enemy_storage': args.enemy_storage,
+                })
+    return jobs
+
+def run_batch(jobs, out, workers=None):
+    """Run jobs on a process pool, writing each result to out as it completes."""
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+        futures = [executor.submit(run_job, job) for job in jobs]
+        for done, future in enumerate(as_completed(futures), 1):
+            out.write(json.dumps(future.result()) + '\n')
+            out.flush()
+            print(f"\r{done}/{len(jobs)} games", end='', file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+
+def value_list(kind):
+    return lambda text: [kind(value) for value in text.split(',')]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seeds', type=int, default=10, help="games per parameter set and policy")
+    parser.add_argument('--first-seed', type=int, default=0)
+    for name, kind in PARAMETERS.items():
+        parser.add_argument('--' + name.replace('_', '-'), dest=name, type=value_list(kind),
+                            help=f"comma-separated values for {name} (default: settings.json)")
+    parser.add_argument('--policy', type=value_list(str), default=['spread'],
+                        help=f"comma-separated placement policies: {', '.join(POLICIES)}")
+    parser.add_argument('--ticks', type=int, default=36000, help="tick limit per game")
+    parser.add_argument('--sample-every', type=int, default=600,
+                        help="ticks between balance curve samples")
+    parser.add_argument('--enemy-storage', choices=['objects', 'arrays'])
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--out', default='results.jsonl', help="JSON lines output file")
+    args = parser.parse_args(argv)
+
+    unknown = [policy for policy in args.policy if policy not in POLICIES]
+    if unknown:
+        parser.error(f"unknown policy: {', '.join(unknown)}")
+
+    jobs = build_jobs(args)
+    start = time.perf_counter()
+    with open(args.out, 'w') as out:
+        run_batch(jobs, out, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"{len(jobs)} games in {elapsed:.1f} s on {args.workers or os.cpu_count()} workers "
+          f"-> {args.out}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""Scenario benchmarks for the headless simulation, with stored baselines.
+
+Record a baseline, then check later runs against it:
+    python bench_suite.py --save baseline.json
+    python bench_suite.py --compare baseline.json --threshold 0.15
+
+--compare exits with status 1 if any scenario regressed by more than the
+threshold (a fraction: 0.15 means 15%).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+from simulation import create_world
+
+# name -> (towers, enemies)
+SCENARIOS = {
+    'small': (10, 100),
+    'medium': (50, 1000),
+    'large': (200, 5000),
+}
+
+# metric -> True if higher is better
+METRICS = {
+    'ticks_per_second': True,
+    'p50_ms': False,
+    'p99_ms': False,
+    'peak_alloc_kib': False,
+}
+
+def build_world(towers, enemies, seed, enemy_storage=None):
+    """Create a world with towers on both sides of the road and enemies spread along it."""
+    rng = random.Random(seed)
+    world = create_world(seed, enemy_storage)
+    world.health = float('inf')  # keep running no matter how many leak
+    world.stop_spawning()  # population is managed by top_up()
+    width = world.config.world_width
+    road_center = world.config.world_height // 2
+
+    for i in range(towers):
+        side = -1 if i % 2 else 1
+        x = rng.uniform(0, width)
+        y = road_center + side * rng.uniform(80, road_center - 40)
+        world.add_tower(world.create_tower((x, y)))
+
+    top_up(world, enemies, rng, spread=True)
+    return world, rng
+
+def top_up(world, enemies, rng, spread=False):
+    """Refill the world to the scenario's enemy count."""
+    missing = enemies - len(world.moving_objects)
+    if missing <= 0:
+        return
+    object_speed = world.config.snapshot.object_speed / world.tick_rate
+    width = world.config.world_width
+    speeds = [rng.uniform(object_speed * 0.8, object_speed * 1.2) for _ in range(missing)]
+    positions = [rng.uniform(0, width - 1) if spread else 0 for _ in range(missing)]
+    if world.array_enemies:
+        start = world.moving_objects.count
+        world.moving_objects.spawn(speeds)
+        world.moving_objects.position[start:start + missing] = positions
+    else:
+        for speed, position in zip(speeds, positions):
+            enemy = world.pools.enemies.acquire()
+            enemy.reset(speed)
+            enemy.position = position
+            world.moving_objects.add(enemy)
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def run_scenario(towers, enemies, ticks, seed=0, enemy_storage=None):
+    """Time ticks world updates and measure peak Python allocations in a shorter second pass."""
+    world, rng = build_world(towers, enemies, seed, enemy_storage)
+    tick_times = []
+    for _ in range(ticks):
+        top_up(world, enemies, rng)
+        start = time.perf_counter()
+        world.update()
+        tick_times.append(time.perf_counter() - start)
+
+    # tracemalloc slows everything down, so it gets its own run
+    world, rng = build_world(towers, enemies, seed, enemy_storage)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline_memory = tracemalloc.get_traced_memory()[0]
+    for _ in range(max(1, ticks // 10)):
+        top_up(world, enemies, rng)
+        world.update()
+    peak = tracemalloc.get_traced_memory()[1] - baseline_memory
+    tracemalloc.stop()
+
+    tick_times.sort()
+    return {
+        'towers': towers,
+        'enemies': enemies,
+        'ticks': ticks,
+        'ticks_per_second': ticks / sum(tick_times),
+        'p50_ms': percentile(tick_times, 0.50) * 1000,
+        'p99_ms': percentile(tick_times, 0.99) * 1000,
+        'peak_alloc_kib': peak / 1024,
+    }
+
+def run_suite(names, ticks, enemy_storage=None):
+    results = {}
+    for name in names:
+        towers, enemies = SCENARIOS[name]
+        results[name] = run_scenario(towers, enemies, ticks, enemy_storage=enemy_storage)
+        print_result(name, results[name])
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'machine': platform.machine(),
+            'enemy_storage': enemy_storage or 'config',
+        },
+        'scenarios': results,
+    }
+
+def print_result(name, result):
+    print(f"{name:8s} {result['towers']:4d} towers {result['enemies']:6d} enemies: "
+          f"{result['ticks_per_second']:9.1f} ticks/s  p50 {result['p50_ms']:7.3f} ms  "
+          f"p99 {result['p99_ms']:7.3f} ms  peak {result['peak_alloc_kib']:9.1f} KiB")
+
+def compare(report, baseline, threshold):
+    """Return a list of human-readable regressions beyond threshold."""
+    regressions = []
+    for name, result in report['scenarios'].items():
+        previous = baseline['scenarios'].get(name)
+        if previous is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = previous[metric], result[metric]
+            if old <= 0:
+                continue
+            change = (new - old) / old
+            if higher_is_better:
+                change = -change
+            if change > threshold:
+                regressions.append(f"{name}.{metric}: {old:.3f} -> {new:.3f} ({change:+.1%} worse)")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help="scenario to run (repeatable, default: all)")
+    parser.add_argument('--ticks', type=int, default=600)
+    parser.add_argument('--enemy-storage', choices=['objects', 'arrays'])
+    parser.add_argument('--save', metavar='PATH', help="write results as a JSON baseline")
+    parser.add_argument('--compare', metavar='PATH', help="compare against a JSON baseline")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="allowed regression as a fraction (default: 0.15)")
+    args = parser.parse_args(argv)
+
+    pygame.init()
+    report = run_suite(args.scenario or list(SCENARIOS), args.ticks, args.enemy_storage)
+    pygame.quit()
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=4)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"Regressions beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""Micro-benchmarks for the game's hot paths.
+
+Run headless with:
+    python benchmark.py spawn
+    python benchmark.py sprites --count 10000
+    python benchmark.py targeting --towers 50
+    python benchmark.py storage --count 20000
+    python benchmark.py render
+    python benchmark.py events --count 200
+    python benchmark.py placement --towers 500
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+import entities
+from config import GameConfig, get_config
+from entities import MovingObject, Projectile, Tower
+from resources import sprite_cache
+from spatial import EnemyIndex
+from world import GameWorld
+
+def time_call(func, repeat):
+    """Return the best-of-three mean seconds per call of func."""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best
+
+def surface_bytes(surface):
+    return surface.get_bytesize() * surface.get_width() * surface.get_height()
+
+def bench_spawn(repeat):
+    """Cost of one spawn wave with a shared config vs. re-reading settings.json per entity."""
+    world = GameWorld()
+
+    def spawn():
+        world.create_moving_objects()
+        world.moving_objects.clear()
+
+    shared = time_call(spawn, repeat)
+
+    # Emulate the old behaviour: every entity built its own GameConfig from disk
+    shared_factory = entities.get_config
+    entities.get_config = GameConfig
+    try:
+        uncached = time_call(spawn, repeat)
+    finally:
+        entities.get_config = shared_factory
+
+    print(f"spawn wave (5 enemies), {repeat} waves")
+    print(f"  per-entity GameConfig(): {uncached * 1e6:10.1f} us/wave")
+    print(f"  shared config:           {shared * 1e6:10.1f} us/wave")
+    print(f"  speedup:                 {uncached / shared:10.1f}x")
+
+def bench_sprites(count):
+    """Spawn count enemies and projectiles and report sprite cache sharing."""
+    world = GameWorld()
+    sprite_cache.clear()
+    sprite_cache.hits = sprite_cache.misses = 0
+
+    start = time.perf_counter()
+    enemies = [MovingObject(2, world.resources) for _ in range(count)]
+    projectiles = [Projectile(0, 0, 100, 100, world.resources) for _ in range(count)]
+    elapsed = time.perf_counter() - start
+
+    stats = sprite_cache.stats()
+    unshared_bytes = count * (surface_bytes(enemies[0].surface) + surface_bytes(projectiles[0].surface))
+
+    print(f"{count} enemies + {count} projectiles in {elapsed * 1000:.1f} ms")
+    print(f"  cache hits/misses:       {stats['hits']}/{stats['misses']}")
+    print(f"  cached entries:          {stats['entries']}")
+    print(f"  cached surface memory:   {stats['surface_bytes'] / 1024:10.1f} KiB")
+    print(f"  unshared surface memory: {unshared_bytes / 1024:10.1f} KiB")
+
+def bench_targeting(tower_count, enemy_counts=(100, 1000, 10000)):
+    """Per-tick target acquisition cost: linear scan per tower vs. the shared EnemyIndex."""
+    rng = random.Random(1)
+    world = GameWorld()
+    width = world.config.world_width
+    road_center = world.config.world_height // 2
+    towers = [
+        Tower(rng.uniform(0, width), road_center + rng.choice((-1, 1)) * rng.uniform(60, 250), world.resources)
+        for _ in range(tower_count)
+    ]
+
+    print(f"target acquisition, {tower_count} towers")
+    for enemy_count in enemy_counts:
+        enemies = [MovingObject(2, world.resources) for _ in range(enemy_count)]
+        for enemy in enemies:
+            enemy.position = rng.uniform(0, width)
+        index = EnemyIndex()
+
+        def linear():
+            return [tower.find_target(enemies) for tower in towers]
+
+        def indexed():
+            index.rebuild(enemies)
+            return [tower.find_target(enemies, index) for tower in towers]
+
+        assert linear() == indexed(), "indexed targeting diverged from the linear scan"
+        repeat = max(1, 20000 // enemy_count)
+        linear_time = time_call(linear, repeat)
+        indexed_time = time_call(indexed, repeat)
+        print(f"  {enemy_count:6d} enemies: linear {linear_time * 1000:8.3f} ms/tick, "
+              f"indexed {indexed_time * 1000:8.3f} ms/tick ({linear_time / indexed_time:5.1f}x)")
+
+def fill_world(world, count, rng):
+    """Add count slow enemies spread along the road so none leak during the run."""
+    width = world.config.world_width
+    speeds = [rng.uniform(0.01, 0.02) for _ in range(count)]
+    positions = [rng.uniform(0, width - 10) for _ in range(count)]
+    if world.array_enemies:
+        world.moving_objects.clear()
+        world.moving_objects.spawn(speeds)
+        world.moving_objects.position[:count] = positions
+    else:
+        world.moving_objects.clear()
+        for speed, position in zip(speeds, positions):
+            enemy = MovingObject(speed, world.resources)
+            enemy.position = position
+            world.moving_objects.add(enemy)
+
+def bench_storage(count, repeat):
+    """GameWorld.update and draw cost with MovingObject lists vs. the NumPy EnemyStore."""
+    config = get_config()
+    screen = pygame.Surface((config.world_width, config.world_height))
+    print(f"world tick with {count} enemies")
+    for storage in ('objects', 'arrays'):
+        world = GameWorld(enemy_storage=storage)
+        if storage == 'arrays' and not world.array_enemies:
+            print("  arrays: numpy not installed, skipped")
+            continue
+        world.stop_spawning()  # no spawns during the run
+        fill_world(world, count, random.Random(1))
+        update_time = time_call(world.update, repeat)
+        draw_time = time_call(lambda: world.draw(screen), repeat)
+        print(f"  {storage:7s}: update {update_time * 1000:8.3f} ms, draw {draw_time * 1000:8.3f} ms")
+
+def bench_render(repeat):
+    """Menu frame cost with full fill-and-flip vs. dirty-rect updates."""
+    from main import Game
+    game = Game()
+    game.current_state = "MENU"
+    config = game.config
+    hover = pygame.event.Event(pygame.MOUSEMOTION, pos=game.menu_start.rect.center)
+    away = pygame.event.Event(pygame.MOUSEMOTION, pos=(0, 0))
+    frames = [0]
+    original = config.dirty_rects
+
+    def frame():
+        # Hover the first button on and off every 30 frames, otherwise idle
+        frames[0] += 1
+        if frames[0] % 30 == 0:
+            game.menu_start.handle_event(hover if frames[0] % 60 else away)
+        game.draw()
+
+    print("MENU frame")
+    for dirty in (False, True):
+        config.settings['performance']['dirty_rects'] = dirty
+        config.publish()
+        game.renderer.invalidate()
+        game.draw()
+        renders = game.resources.text.renders
+        frame_time = time_call(frame, repeat)
+        renders = game.resources.text.renders - renders
+        print(f"  {'dirty rects' if dirty else 'full redraw':12s}: {frame_time * 1e6:10.1f} us/frame, "
+              f"{renders} new text surfaces")
+    config.settings['performance']['dirty_rects'] = original
+    config.publish()
+
+def bench_events(count, repeat):
+    """Cost of routing mouse motion to a menu of count buttons, per event."""
+    from resources import ResourceManager
+    from router import EventRouter
+    resources = ResourceManager()
+    columns = 20
+    buttons = [resources.create_button(20 + (i % columns) * 60, 20 + (i // columns) * 30, 50, 25, "", "BLUE")
+               for i in range(count)]
+    router = EventRouter()
+    for button in buttons:
+        router.add("MENU", button)
+    rng = random.Random(1)
+    width, height = 20 + columns * 60, 20 + (count // columns + 1) * 30
+    events = [pygame.event.Event(pygame.MOUSEMOTION, pos=(rng.randrange(width), rng.randrange(height)))
+              for _ in range(repeat)]
+
+    def linear():
+        for event in events:
+            for button in buttons:
+                button.handle_event(event)
+
+    def routed():
+        for event in events:
+            router.route("MENU", event)
+
+    print(f"MOUSEMOTION with {count} buttons")
+    for name, func in (('every widget', linear), ('router', routed)):
+        print(f"  {name:12s}: {time_call(func, 1) / repeat * 1e6:8.2f} us/event")
+
+def bench_placement(towers, repeat):
+    """Tower placement checks and tower picking with many towers placed."""
+    world = GameWorld(rng=random.Random(1))
+    world.balance = float('inf')
+    rng = random.Random(1)
+    width, height = world.layout.size
+    # Random spots until enough towers fit; a small world may fill up first
+    for _ in range(towers * 100):
+        if len(world.towers) >= towers:
+            break
+        world.place_tower((rng.randrange(width), rng.randrange(height)))
+    points = [(rng.randrange(width), rng.randrange(height)) for _ in range(repeat)]
+    grid = world.occupancy_grid()
+
+    print(f"{len(world.towers)} towers")
+    check = time_call(lambda: [world.is_valid_tower_placement(point) for point in points], 1)
+    pick = time_call(lambda: [grid.tower_at(point) for point in points], 1)
+    print(f"  placement check: {check / repeat * 1e6:8.3f} us")
+    print(f"  tower pick     : {pick / repeat * 1e6:8.3f} us")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('benchmark', choices=['spawn', 'sprites', 'targeting', 'storage', 'render', 'events',
+                                                    'placement'])
+    parser.add_argument('--repeat', type=int, default=1000)
+    parser.add_argument('--count', type=int, default=10000)
+    parser.add_argument('--towers', type=int, default=50)
+    args = parser.parse_args()
+
+    pygame.init()
+    if args.benchmark == 'spawn':
+        bench_spawn(args.repeat)
+    elif args.benchmark == 'sprites':
+        bench_sprites(args.count)
+    elif args.benchmark == 'targeting':
+        bench_targeting(args.towers)
+    elif args.benchmark == 'storage':
+        bench_storage(args.count, max(1, args.repeat // 100))
+    elif args.benchmark == 'render':
+        bench_render(args.repeat)
+    elif args.benchmark == 'events':
+        bench_events(args.count, args.repeat)
+    elif args.benchmark == 'placement':
+        bench_placement(args.towers, args.repeat)
+    pygame.quit()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import time
+
+# Shared origin so every WallClock agrees, like pygame.time.get_ticks()
+_START = time.monotonic()
+
+class TickClock:
+    """Simulation clock that moves forward a fixed step per world tick.
+
+    get_ticks() returns milliseconds like pygame.time.get_ticks(), so game
+    logic written against wall time works unchanged, but time only passes
+    when the owner calls advance(). That makes runs reproducible and lets
+    headless simulations go as fast as the CPU allows.
+    """
+    def __init__(self, tick_ms=1000 / 60):
+        self.tick_ms = tick_ms
+        self.ticks = 0
+
+    def advance(self, ticks=1):
+        self.ticks += ticks
+
+    def get_ticks(self):
+        return int(self.ticks * self.tick_ms)
+
+class WallClock:
+    """Real-time milliseconds since startup.
+
+    Uses time.monotonic() rather than pygame.time.get_ticks(), which reads 0
+    unless pygame.init() brought up SDL's timer subsystem.
+    """
+    def advance(self, ticks=1):
+        pass
+
+    def get_ticks(self):
+        return int((time.monotonic() - _START) * 1000)
+
+class FixedStep:
+    """Turns real elapsed time into a whole number of fixed simulation steps.
+
+    Time accumulates across frames and is paid out step by step, so the
+    simulation keeps its rate whatever the frame rate is. What's left over
+    is alpha, the fraction of a step the drawn frame lies between the last
+    two simulation states. If a frame would need more than max_steps
+    catch-up steps, the backlog is dropped instead: the game slows down
+    for a moment rather than spending ever longer frames catching up.
+    """
+    def __init__(self, step_seconds, max_steps=5):
+        self.step_seconds = step_seconds
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.dropped = 0  # steps skipped to stay responsive
+
+    def advance(self, elapsed):
+        """Add elapsed seconds and return how many steps to run now."""
+        self.accumulator += elapsed
+        steps = int(self.accumulator / self.step_seconds)
+        if steps > self.max_steps:
+            self.dropped += steps - self.max_steps
+            steps = self.max_steps
+            self.accumulator = self.accumulator % self.step_seconds
+        else:
+            self.accumulator -= steps * self.step_seconds
+        return steps
+
+    @property
+    def alpha(self):
+        return min(1.0, self.accumulator / self.step_seconds)
+
+    def reset(self):
+        self.accumulator = 0.0
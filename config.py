@@ -1,21 +1,99 @@
+import atexit
+import copy
 import json
 import os
+import threading
+import time
+import warnings
+import weakref
+
+SETTINGS_FILE = 'settings.json'
+SETTINGS_VERSION = 2
+
+# Flat snapshot attribute -> (category, key) in the settings dict
+SNAPSHOT_FIELDS = {
+    'window_width': ('window', 'width'),
+    'window_height': ('window', 'height'),
+    'window_title': ('window', 'title'),
+    'fps': ('window', 'fps'),
+    'starting_health': ('game', 'starting_health'),
+    'starting_balance': ('game', 'starting_balance'),
+    'tower_cost': ('game', 'tower_cost'),
+    'object_speed': ('game', 'object_speed'),
+    'object_spawn_rate': ('game', 'object_spawn_rate'),
+    'tick_rate': ('game', 'tick_rate'),
+    'health_bar_width_percentage': ('ui', 'health_bar_width_percentage'),
+    'health_bar_height_percentage': ('ui', 'health_bar_height_percentage'),
+    'button_min_width': ('ui', 'button_min_width'),
+    'button_height': ('ui', 'button_height'),
+    'slider_height': ('ui', 'slider_height'),
+    'dialog_width_percentage': ('ui', 'dialog_width_percentage'),
+    'dialog_height_percentage': ('ui', 'dialog_height_percentage'),
+    'enemy_storage': ('performance', 'enemy_storage'),
+    'dirty_rects': ('performance', 'dirty_rects'),
+    'text_cache_kib': ('performance', 'text_cache_kib'),
+    'enemy_pool_size': ('performance', 'enemy_pool_size'),
+    'projectile_pool_size': ('performance', 'projectile_pool_size'),
+    'hit_resolution': ('performance', 'hit_resolution'),
+    'render_resolution': ('performance', 'render_resolution'),
+    'max_catch_up_steps': ('performance', 'max_catch_up_steps'),
+    'simulation_thread': ('performance', 'simulation_thread'),
+}
+
+def migrate_settings(saved):
+    """Bring settings saved by an older version up to SETTINGS_VERSION, in place."""
+    if saved.get('version', 1) < 2:
+        # The world used to step once per rendered frame, with speeds in pixels per frame
+        fps = saved.get('window', {}).get('fps', 60)
+        game = saved.setdefault('game', {})
+        if 'object_speed' in game:
+            game['object_speed'] *= fps
+        game.setdefault('tick_rate', fps)
+    saved['version'] = SETTINGS_VERSION
+    return saved
+
+def world_size(settings):
+    """Size of the world's coordinate space: render_resolution if set, else the window."""
+    resolution = settings['performance']['render_resolution']
+    if resolution:
+        return tuple(resolution)
+    return settings['window']['width'], settings['window']['height']
+
+class ConfigSnapshot:
+    """Read-only copy of the settings with plain attributes for hot loops."""
+    __slots__ = tuple(SNAPSHOT_FIELDS) + ('world_width', 'world_height')
+
+    def __init__(self, settings):
+        for name, (category, key) in SNAPSHOT_FIELDS.items():
+            object.__setattr__(self, name, settings[category][key])
+        width, height = world_size(settings)
+        object.__setattr__(self, 'world_width', width)
+        object.__setattr__(self, 'world_height', height)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ConfigSnapshot is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError("ConfigSnapshot is read-only")
 
 class GameConfig:
-    def __init__(self):
+    def __init__(self, path=SETTINGS_FILE):
+        self.path = path
         self.default_settings = {
+            'version': SETTINGS_VERSION,
             'window': {
                 'width': 1200,
                 'height': 800,
                 'title': 'Tower Defense Game',
-                'fps': 60
+                'fps': 60  # rendered frames per second
             },
             'game': {
                 'starting_health': 100,
                 'starting_balance': 100,
                 'tower_cost': 50,
-                'object_speed': 2,
-                'object_spawn_rate': 2000  # milliseconds
+                'object_speed': 120,  # pixels per second
+                'object_spawn_rate': 2000,  # milliseconds
+                'tick_rate': 60  # simulation steps per second
             },
             'ui': {
                 'health_bar_width_percentage': 0.3,
@@ -25,23 +103,118 @@ class GameConfig:
                 'slider_height': 20,
                 'dialog_width_percentage': 0.4,
                 'dialog_height_percentage': 0.3
+            },
+            'performance': {
+                'enemy_storage': 'objects',  # 'objects' or 'arrays' (needs numpy)
+                'dirty_rects': False,  # only push changed screen regions
+                'text_cache_kib': 4096,  # memory cap for rendered text surfaces
+                'enemy_pool_size': 500,  # high-water marks for the entity pools
+                'projectile_pool_size': 500,
+                'hit_resolution': 'collision',  # or 'analytic': hits computed when fired
+                'render_resolution': None,  # [width, height] to render at and scale to the window
+                'max_catch_up_steps': 5,  # simulation steps per frame before falling behind real time
+                'simulation_thread': False  # step the world on its own thread, draw from snapshots
             }
         }
+        self.mtime = None
+        self.check_interval = 1.0  # seconds between mtime checks
+        self.next_check = 0.0
+        self.subscribers = []
+        
+        # Write-behind persistence: set() marks the settings dirty and a
+        # background thread writes the latest state, so bursts coalesce
+        self.condition = threading.Condition()
+        self.pending = False  # changes not yet handed to the writer
+        self.writing = False
+        self.writer = None  # None until the first change, and again after a failed write
+        self.flush_at_exit = False
         self.settings = self.load_settings()
+        self.snapshot = ConfigSnapshot(self.settings)
+
+    def get_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
 
     def load_settings(self):
-        if os.path.exists('settings.json'):
-            with open('settings.json', 'r') as f:
-                saved_settings = json.load(f)
+        self.mtime = self.get_mtime()
+        if self.mtime is not None:
+            with open(self.path, 'r') as f:
+                saved_settings = migrate_settings(json.load(f))
                 return self.merge_settings(self.default_settings, saved_settings)
-        return self.default_settings.copy()
+        return copy.deepcopy(self.default_settings)
 
     def save_settings(self):
-        with open('settings.json', 'w') as f:
-            json.dump(self.settings, f, indent=4)
+        """Write the settings now, on the calling thread."""
+        with self.condition:
+            data = json.dumps(self.settings, indent=4)
+            self.pending = False
+            self.write_atomic(data)
+            # Our own write must not look like an external edit
+            self.mtime = self.get_mtime()
+
+    def write_atomic(self, data):
+        # Write a temp file and rename it over the old one, so a crash leaves
+        # either the old or the new settings, never a mix
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+    def schedule_save(self):
+        """Have the writer thread persist the settings soon; never blocks."""
+        with self.condition:
+            self.pending = True
+            if self.writer is None:
+                self.writer = threading.Thread(target=self.write_behind, name='settings-writer', daemon=True)
+                self.writer.start()
+                if not self.flush_at_exit:
+                    atexit.register(self.flush)
+                    self.flush_at_exit = True
+            self.condition.notify_all()
+
+    def write_behind(self):
+        try:
+            while True:
+                with self.condition:
+                    while not self.pending:
+                        self.condition.wait()
+                    data = json.dumps(self.settings, indent=4)
+                    self.pending = False
+                    self.writing = True
+                try:
+                    self.write_atomic(data)
+                except OSError as error:
+                    warnings.warn(f"Could not save settings to {self.path}: {error}")
+                    with self.condition:
+                        # Still unsaved; the next change starts a new writer that retries
+                        self.pending = True
+                        self.writing = False
+                        self.writer = None
+                        self.condition.notify_all()
+                    return
+                with self.condition:
+                    self.mtime = self.get_mtime()
+                    self.writing = False
+                    self.condition.notify_all()
+        finally:
+            with self.condition:
+                if self.writer is threading.current_thread():
+                    self.writer = None
+                    self.writing = False
+                    self.condition.notify_all()
+
+    def flush(self, timeout=5.0):
+        """Block until scheduled writes have reached the file; return False on timeout or failure."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.writer is None or not (self.pending or self.writing), timeout)
+            return not (self.pending or self.writing)
 
     def merge_settings(self, default, saved):
-        merged = default.copy()
+        merged = copy.deepcopy(default)
         for key, value in saved.items():
             if key in merged:
                 if isinstance(merged[key], dict) and isinstance(value, dict):
@@ -50,12 +223,69 @@ class GameConfig:
                     merged[key] = value
         return merged
 
+    def reload_if_changed(self, force=False):
+        """Reload settings if the file's mtime changed. Checks are throttled to check_interval."""
+        now = time.monotonic()
+        if not force and now < self.next_check:
+            return False
+        self.next_check = now + self.check_interval
+        with self.condition:
+            # The file is ours while a write is queued or running. After a failed
+            # write it isn't, and an edit on disk replaces the unsaved changes.
+            if self.writing or (self.pending and self.writer is not None):
+                return False
+        if self.get_mtime() == self.mtime:
+            return False
+        with self.condition:
+            self.settings = self.load_settings()
+            self.pending = False
+        self.publish()
+        return True
+
+    def subscribe(self, callback):
+        """Call callback(snapshot) whenever the settings change.
+
+        Bound methods are held weakly so a discarded GameWorld or widget
+        doesn't stay alive just because it subscribed.
+        """
+        if hasattr(callback, '__self__'):
+            ref = weakref.WeakMethod(callback)
+        else:
+            ref = lambda: callback
+        self.subscribers.append(ref)
+
+    def unsubscribe(self, callback):
+        self.subscribers = [ref for ref in self.subscribers if ref() not in (None, callback)]
+
+    def publish(self):
+        self.snapshot = ConfigSnapshot(self.settings)
+        for ref in self.subscribers[:]:
+            callback = ref()
+            if callback is None:
+                self.subscribers.remove(ref)
+            else:
+                callback(self.snapshot)
+
     def get(self, category, key):
         return self.settings[category][key]
 
     def set(self, category, key, value):
-        self.settings[category][key] = value
-        self.save_settings()
+        self.set_many({category: {key: value}})
+
+    def set_many(self, changes):
+        """Apply {category: {key: value}} as one change: one publish and one file write."""
+        with self.condition:
+            for category, values in changes.items():
+                self.settings[category].update(values)
+        self.schedule_save()
+        self.publish()
+
+    def override(self, overrides):
+        """Apply {category: {key: value}} in memory only, without touching the file."""
+        with self.condition:
+            for category, values in overrides.items():
+                self.settings[category].update(values)
+        self.publish()
 
     # Properties for easy access to common settings
     @property
@@ -94,6 +324,10 @@ class GameConfig:
     def object_spawn_rate(self):
         return self.get('game', 'object_spawn_rate')
 
+    @property
+    def tick_rate(self):
+        return self.get('game', 'tick_rate')
+
     @property
     def health_bar_width_percentage(self):
         return self.get('ui', 'health_bar_width_percentage')
@@ -120,4 +354,57 @@ class GameConfig:
 
     @property
     def dialog_height_percentage(self):
-        return self.get('ui', 'dialog_height_percentage') 
\ No newline at end of file
+        return self.get('ui', 'dialog_height_percentage')
+
+    @property
+    def enemy_storage(self):
+        return self.get('performance', 'enemy_storage')
+
+    @property
+    def dirty_rects(self):
+        return self.get('performance', 'dirty_rects')
+
+    @property
+    def text_cache_kib(self):
+        return self.get('performance', 'text_cache_kib')
+
+    @property
+    def enemy_pool_size(self):
+        return self.get('performance', 'enemy_pool_size')
+
+    @property
+    def projectile_pool_size(self):
+        return self.get('performance', 'projectile_pool_size')
+
+    @property
+    def hit_resolution(self):
+        return self.get('performance', 'hit_resolution')
+
+    @property
+    def render_resolution(self):
+        return self.get('performance', 'render_resolution')
+
+    @property
+    def max_catch_up_steps(self):
+        return self.get('performance', 'max_catch_up_steps')
+
+    @property
+    def simulation_thread(self):
+        return self.get('performance', 'simulation_thread')
+
+    @property
+    def world_width(self):
+        return world_size(self.settings)[0]
+
+    @property
+    def world_height(self):
+        return world_size(self.settings)[1]
+
+_shared_config = None
+
+def get_config():
+    """Return the process-wide GameConfig, loading settings.json on first use."""
+    global _shared_config
+    if _shared_config is None:
+        _shared_config = GameConfig()
+    return _shared_config
@@ -0,0 +1,205 @@
+import pygame
+from config import get_config
+from entities import draw_health_bar
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; GameWorld falls back to MovingObject lists
+    np = None
+
+HAS_NUMPY = np is not None
+
+class EnemyView:
+    """Thin stand-in for a MovingObject backed by one slot of an EnemyStore.
+
+    Views are cheap and short-lived: slots move when the store compacts at
+    the start of each tick, so never keep a view across ticks. Keep its
+    handle, the enemy's stable id, and look it up again with store.get().
+    """
+    __slots__ = ('store', 'slot')
+
+    def __init__(self, store, slot):
+        self.store = store
+        self.slot = slot
+
+    def __eq__(self, other):
+        return isinstance(other, EnemyView) and other.store is self.store and other.slot == self.slot
+
+    def __hash__(self):
+        return hash((id(self.store), self.slot))
+
+    @property
+    def handle(self):
+        return int(self.store.ids[self.slot])
+
+    @property
+    def position(self):
+        return float(self.store.position[self.slot])
+
+    @position.setter
+    def position(self, value):
+        self.store.position[self.slot] = value
+
+    @property
+    def speed(self):
+        return float(self.store.speed[self.slot])
+
+    @property
+    def health(self):
+        return int(self.store.health[self.slot])
+
+    @property
+    def max_health(self):
+        return self.store.max_health
+
+    @property
+    def size(self):
+        return self.store.size
+
+    @property
+    def surface(self):
+        return self.store.surface
+
+    @property
+    def mask(self):
+        return self.store.mask
+
+    @property
+    def rect(self):
+        rect = self.store.surface.get_rect()
+        rect.center = (int(self.store.position[self.slot]), self.store.lane_y)
+        return rect
+
+    def take_damage(self, damage):
+        self.store.health[self.slot] -= damage
+        return self.store.health[self.slot] <= 0  # Return True if enemy dies
+
+    def draw(self, surface, lag=0.0):
+        rect = self.rect
+        if lag:
+            rect.centerx = int(self.store.position[self.slot] - self.store.speed[self.slot] * lag)
+        drawn = surface.blit(self.store.surface, rect)
+        if self.health < self.max_health:
+            drawn.union_ip(draw_health_bar(surface, self.store.resources, rect, self.health, self.max_health))
+        return drawn
+
+class EnemyStore:
+    """Struct-of-arrays storage for enemies, advanced in one vectorized step.
+
+    Behaves like the moving_objects list as far as Tower and GameWorld are
+    concerned: iterating yields EnemyView objects for live enemies and
+    remove() marks an enemy dead. Dead and leaked slots are compacted away
+    in bulk by step().
+    """
+    def __init__(self, resource_manager, capacity=1024):
+        if np is None:
+            raise ImportError("EnemyStore requires numpy")
+        self.config = get_config()
+        self.resources = resource_manager
+        self.count = 0
+        self.position = np.zeros(capacity, dtype=np.float64)
+        self.speed = np.zeros(capacity, dtype=np.float64)
+        self.health = np.zeros(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.ids = np.zeros(capacity, dtype=np.int64)  # ascending, so slots can be found by bisection
+        self.next_id = 0
+        self.max_health = 10
+        self.update_geometry()
+
+    def update_geometry(self):
+        snapshot = self.config.snapshot
+        self.size = self.resources.get_enemy_size(snapshot.world_height)
+        self.lane_y = snapshot.world_height // 2
+        self.surface, self.mask = self.resources.get_sprite(
+            'enemy', self.size, self.resources.get_color('RED')
+        )
+
+    def grow(self, needed):
+        capacity = len(self.position)
+        while capacity < needed:
+            capacity *= 2
+        for name in ('position', 'speed', 'health', 'alive', 'ids'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def spawn(self, speeds):
+        """Append enemies at the left edge with the given speeds."""
+        start = self.count
+        end = start + len(speeds)
+        if end > len(self.position):
+            self.grow(end)
+        self.position[start:end] = 0
+        self.speed[start:end] = speeds
+        self.health[start:end] = self.max_health
+        self.alive[start:end] = True
+        self.ids[start:end] = np.arange(self.next_id, self.next_id + len(speeds))
+        self.next_id += len(speeds)
+        self.count = end
+
+    def step(self, world_width):
+        """Move every enemy, compact dead and leaked slots, return how many leaked."""
+        n = self.count
+        position = self.position[:n]
+        alive = self.alive[:n]
+        position += self.speed[:n]
+
+        leaked = int(np.count_nonzero(alive & (position > world_width)))
+        keep = alive & (position < world_width)
+        kept = int(np.count_nonzero(keep))
+        if kept != n:
+            for array in (self.position, self.speed, self.health, self.alive, self.ids):
+                array[:kept] = array[:n][keep]
+            self.count = kept
+        return leaked
+
+    def alive_slots(self):
+        return np.flatnonzero(self.alive[:self.count])
+
+    def view(self, slot):
+        return EnemyView(self, int(slot))
+
+    def get(self, handle):
+        """Return a view of the enemy with id handle if it is still alive, else None."""
+        n = self.count
+        slot = int(np.searchsorted(self.ids[:n], handle))
+        if slot < n and self.ids[slot] == handle and self.alive[slot]:
+            return EnemyView(self, slot)
+        return None
+
+    def remove(self, enemy):
+        self.alive[enemy.slot] = False
+
+    def clear(self):
+        self.count = 0
+
+    def __iter__(self):
+        for slot in self.alive_slots():
+            yield EnemyView(self, int(slot))
+
+    def __len__(self):
+        return int(np.count_nonzero(self.alive[:self.count]))
+
+    def draw(self, surface, lag=0.0):
+        """Blit every live enemy in one batch, then health bars for damaged ones.
+
+        Enemies are drawn lag ticks behind their current positions. Returns
+        a list of Rects covering what was drawn.
+        """
+        slots = self.alive_slots()
+        if not len(slots):
+            return []
+        positions = self.position[slots]
+        if lag:
+            positions = positions - self.speed[slots] * lag
+        # Sprites are fully opaque or fully clear, so enemies stacked on the
+        # same pixel column only need one blit
+        xs = np.unique(positions.astype(np.int64)) - self.size
+        top = self.lane_y - self.size
+        surface.blits([(self.surface, (x, top)) for x in xs.tolist()], doreturn=False)
+        rects = [pygame.Rect(int(xs[0]), top, int(xs[-1] - xs[0]) + self.size * 2, self.size * 2)]
+
+        for slot in slots[self.health[slots] < self.max_health]:
+            rects.append(self.view(slot).draw(surface, lag))
+        return rects
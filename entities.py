@@ -1,12 +1,55 @@
 import pygame
 import math
 from abc import ABC, abstractmethod
-from config import GameConfig
+from config import get_config
 from resources import ResourceManager
+from clock import WallClock
+
+PROJECTILE_SPEED = 600  # pixels per second
+
+def draw_health_bar(surface, resources, rect, health, max_health):
+    """Draw the small red/green bar above a damaged enemy."""
+    bar_width = rect.width
+    bar_height = 4
+    health_percent = health / max_health
+
+    # Background (red)
+    bar_rect = pygame.Rect(
+        rect.centerx - bar_width//2,
+        rect.top - bar_height - 2,
+        bar_width,
+        bar_height
+    )
+    pygame.draw.rect(surface, resources.get_color('RED'), bar_rect)
+
+    # Health (green)
+    health_rect = pygame.Rect(
+        rect.centerx - bar_width//2,
+        rect.top - bar_height - 2,
+        bar_width * health_percent,
+        bar_height
+    )
+    pygame.draw.rect(surface, resources.get_color('GREEN'), health_rect)
+    return bar_rect
+
+def draw_tower(surface, resources, rect, color, selected, tower_range):
+    """Draw a tower, with its highlight and range circle if selected; return the Rect covered."""
+    drawn = pygame.draw.rect(surface, color, rect)
+    pygame.draw.rect(surface, resources.get_color('BLACK'), rect, 2)
+    
+    # Draw selection highlight if selected
+    if selected:
+        highlight_rect = rect.inflate(4, 4)
+        drawn = pygame.draw.rect(surface, resources.get_color('GOLD'), highlight_rect, 2)
+        
+        # Draw range circle
+        drawn.union_ip(pygame.draw.circle(surface, resources.get_color('BLUE'),
+                                          rect.center, tower_range, 1))
+    return drawn
 
 class Entity(ABC):
     def __init__(self, resource_manager):
-        self.config = GameConfig()
+        self.config = get_config()
         self.resources = resource_manager
 
     @abstractmethod
@@ -15,6 +58,7 @@ class Entity(ABC):
 
     @abstractmethod
     def draw(self, surface):
+        """Draw the entity and return the Rect it covered."""
         pass
 
     def handle_event(self, event):
@@ -23,76 +67,74 @@ class Entity(ABC):
 class MovingObject(Entity):
     def __init__(self, speed, resource_manager):
         super().__init__(resource_manager)
+        self.color = self.resources.get_color('RED')
+        self.max_health = 10
+        self.reset(speed)
+
+    def reset(self, speed):
+        """Reinitialize in place so a pooled enemy can be reused."""
         self.speed = speed
         self.position = 0  # Start at left side
         self.has_passed = False
-        self.size = int(self.config.window_height * 0.02)
-        self.color = self.resources.get_color('RED')
-        self.max_health = 10
+        snapshot = self.config.snapshot
+        self.size = self.resources.get_enemy_size(snapshot.world_height)
         self.health = self.max_health
         
-        # Create surface for mask collision
-        self.surface = pygame.Surface((self.size * 2, self.size * 2), pygame.SRCALPHA)
-        pygame.draw.circle(self.surface, self.color, (self.size, self.size), self.size)
-        self.mask = pygame.mask.from_surface(self.surface)
+        # Shared sprite and mask for collision
+        self.surface, self.mask = self.resources.get_sprite('enemy', self.size, self.color)
         
         # Create rect for position
         self.rect = self.surface.get_rect()
         self.rect.centerx = int(self.position)
-        self.rect.centery = self.config.window_height // 2
+        self.rect.centery = snapshot.world_height // 2
 
     def take_damage(self, damage):
         self.health -= damage
         return self.health <= 0  # Return True if enemy dies
 
     def update(self):
+        snapshot = self.config.snapshot
+        
         # Move right
         self.position += self.speed
         
         # Update rect position
         self.rect.centerx = int(self.position)
-        self.rect.centery = self.config.window_height // 2
+        self.rect.centery = snapshot.world_height // 2
         
         # Check if passed screen edge
-        if self.position > self.config.window_width:
+        if self.position > snapshot.world_width:
             self.has_passed = True
             return True
         return False
 
-    def draw(self, surface):
+    def draw(self, surface, lag=0.0):
+        """Draw the enemy lag ticks behind its current position and return the Rect covered."""
+        rect = self.rect
+        if lag:
+            rect = rect.copy()
+            rect.centerx = int(self.position - self.speed * lag)
+        
         # Draw enemy
-        surface.blit(self.surface, self.rect)
+        drawn = surface.blit(self.surface, rect)
         
         # Draw health bar if damaged
         if self.health < self.max_health:
-            bar_width = self.size * 2
-            bar_height = 4
-            health_percent = self.health / self.max_health
-            
-            # Background (red)
-            bar_rect = pygame.Rect(
-                self.rect.centerx - bar_width//2,
-                self.rect.top - bar_height - 2,
-                bar_width,
-                bar_height
-            )
-            pygame.draw.rect(surface, self.resources.get_color('RED'), bar_rect)
-            
-            # Health (green)
-            health_rect = pygame.Rect(
-                self.rect.centerx - bar_width//2,
-                self.rect.top - bar_height - 2,
-                bar_width * health_percent,
-                bar_height
-            )
-            pygame.draw.rect(surface, self.resources.get_color('GREEN'), health_rect)
+            drawn.union_ip(draw_health_bar(surface, self.resources, rect, self.health, self.max_health))
             
         # Debug: Draw collision rect
         # pygame.draw.rect(surface, (255, 0, 0), self.rect, 1)
+        return drawn
 
 class Projectile(Entity):
     def __init__(self, x, y, target_x, target_y, resource_manager, speed=10):
         super().__init__(resource_manager)
+        self.reset(x, y, target_x, target_y, speed)
+
+    def reset(self, x, y, target_x, target_y, speed=10):
+        """Reinitialize in place so a pooled projectile can be reused."""
+        self.target = None  # handle of the enemy it was fired at
+        self.ticks_left = None  # set for visual-only projectiles with a known flight time
         self.x = x
         self.y = y
         self.target_x = target_x
@@ -101,10 +143,8 @@ class Projectile(Entity):
         self.size = 5
         self.color = self.resources.get_color('YELLOW_GREEN')
         
-        # Create surface for mask collision
-        self.surface = pygame.Surface((self.size * 2, self.size * 2), pygame.SRCALPHA)
-        pygame.draw.circle(self.surface, self.color, (self.size, self.size), self.size)
-        self.mask = pygame.mask.from_surface(self.surface)
+        # Shared sprite and mask for collision
+        self.surface, self.mask = self.resources.get_sprite('projectile', self.size, self.color)
         
         # Create rect for position
         self.rect = self.surface.get_rect()
@@ -134,14 +174,19 @@ class Projectile(Entity):
         # Update rect position
         self.rect.center = (int(self.x), int(self.y))
         
+        if self.ticks_left is not None:
+            self.ticks_left -= 1
+            return self.ticks_left <= 0
+        
         # Check if projectile has reached or passed target
         if (self.dx > 0 and self.x >= self.target_x) or \
            (self.dx < 0 and self.x <= self.target_x):
             return True
             
         # Check if projectile is off screen
-        if (self.x < 0 or self.x > self.config.window_width or
-            self.y < 0 or self.y > self.config.window_height):
+        snapshot = self.config.snapshot
+        if (self.x < 0 or self.x > snapshot.world_width or
+            self.y < 0 or self.y > snapshot.world_height):
             return True
             
         return False
@@ -153,18 +198,24 @@ class Projectile(Entity):
         # Check if masks overlap at the current offset
         return self.mask.overlap(target.mask, offset) is not None
 
-    def draw(self, surface):
-        # Draw projectile
-        surface.blit(self.surface, self.rect)
+    def draw(self, surface, lag=0.0):
+        # Draw projectile, lag ticks back along its path
+        if lag:
+            return surface.blit(self.surface, self.surface.get_rect(
+                center=(int(self.x - self.dx * lag), int(self.y - self.dy * lag))))
+        return surface.blit(self.surface, self.rect)
         # Debug: Draw collision rect
         # pygame.draw.rect(surface, (255, 255, 0), self.rect, 1)
 
 class Tower(Entity):
-    def __init__(self, x, y, resource_manager):
+    def __init__(self, x, y, resource_manager, clock=None, pools=None, scheduler=None):
         super().__init__(resource_manager)
+        self.clock = clock or WallClock()
+        self.pools = pools
+        self.scheduler = scheduler
         self.size = self.resources.get_tower_size(
-            self.config.window_width,
-            self.config.window_height
+            self.config.world_width,
+            self.config.world_height
         )
         self.rect = pygame.Rect(x - self.size//2, y - self.size//2, self.size, self.size)
         self.color = self.resources.get_color('BLUE')
@@ -174,73 +225,188 @@ class Tower(Entity):
         self.shoot_cooldown = 1000  # 1 second
         self.range = 300  # Shooting range
         self.damage = 10  # Base tower damage
+        self.ready = False  # cooldown over; only a ready tower looks for targets
+        self.ready_timer = None
+        self.active = None  # the world's active towers, which this one joins while it has work
+        self.pending_hits = []  # (due time, target handle) of analytic hits in flight
+        self.projectile_speed = PROJECTILE_SPEED / self.config.snapshot.tick_rate  # pixels per tick
+        self.schedule_ready()
 
-    def update(self, moving_objects):
-        current_time = pygame.time.get_ticks()
+    def find_target(self, moving_objects, enemy_index=None):
+        """Find the nearest enemy within range that hasn't passed the tower yet."""
+        dy = self.config.snapshot.world_height // 2 - self.rect.centery
+        if enemy_index is not None:
+            return enemy_index.nearest_before(self.rect.centerx, dy, self.range)
         
-        # Find nearest target within range
         nearest_target = None
         min_distance = float('inf')
         
         for obj in moving_objects:
             # Calculate distance to target
             dx = obj.position - self.rect.centerx
-            dy = self.config.window_height // 2 - self.rect.centery
             distance = math.sqrt(dx * dx + dy * dy)
             
             # Only target enemies that haven't passed us yet
             if distance <= self.range and distance < min_distance and obj.position < self.rect.centerx:
                 min_distance = distance
                 nearest_target = obj
+        return nearest_target
+
+    def schedule_ready(self):
+        """Arrange for the tower to become ready once its cooldown since last_shot_time is over."""
+        self.ready = False
+        if self.scheduler is not None:
+            self.scheduler.cancel(self.ready_timer)
+            self.ready_timer = self.scheduler.at(self.last_shot_time + self.shoot_cooldown,
+                                                 self.set_ready)
+
+    def set_ready(self):
+        self.ready = True
+        self.ready_timer = None
+        self.wake()
+
+    def wake(self):
+        """Join the active towers, so the world updates this one every tick."""
+        if self.active is not None:
+            self.active[self] = None
+
+    def is_idle(self):
+        """True if update() would do nothing: reloading with no projectiles in flight."""
+        return not self.ready and not self.projectiles and self.scheduler is not None
+
+    def update(self, moving_objects, enemy_index=None):
+        current_time = self.clock.get_ticks()
+        if self.scheduler is None and not self.ready:
+            # Without a scheduler, poll the cooldown
+            self.ready = current_time - self.last_shot_time >= self.shoot_cooldown
         
-        # Shoot at target if cooldown is over
-        if nearest_target and current_time - self.last_shot_time >= self.shoot_cooldown:
-            self.shoot(nearest_target)
-            self.last_shot_time = current_time
+        # Look for the nearest target in range once the cooldown is over
+        if self.ready:
+            nearest_target = self.find_target(moving_objects, enemy_index)
+            if nearest_target:
+                if self.config.snapshot.hit_resolution == 'analytic' and self.scheduler is not None:
+                    self.fire_analytic(nearest_target, moving_objects, current_time)
+                else:
+                    self.shoot(nearest_target)
+                self.last_shot_time = current_time
+                self.schedule_ready()
         
         # Update projectiles and check for hits
-        for projectile in self.projectiles[:]:
+        remaining = []
+        for projectile in self.projectiles:
             if projectile.update():
-                self.projectiles.remove(projectile)
-            elif nearest_target and projectile.check_hit(nearest_target):
+                self.release(projectile)
+                continue
+            
+            # The target may already have been killed, by us or another tower
+            target = moving_objects.get(projectile.target) if projectile.target is not None else None
+            if target is not None and projectile.check_hit(target):
                 # Apply damage and check if enemy dies
-                if nearest_target.take_damage(self.damage):
-                    moving_objects.remove(nearest_target)
-                self.projectiles.remove(projectile)
+                if target.take_damage(self.damage):
+                    moving_objects.remove(target)
+                    if enemy_index is not None:
+                        enemy_index.remove(target)
+                self.release(projectile)
+                continue
+            remaining.append(projectile)
+        self.projectiles = remaining
+        
+        # Leave the active towers until the next set_ready()
+        if self.active is not None and self.is_idle():
+            self.active.pop(self, None)
+
+    def intercept_ticks(self, target):
+        """Ticks until a projectile fired now meets target, or None if it can't catch it.
+
+        Solves |enemy(t) - tower| = projectile_speed * t for the enemy moving
+        along the lane at constant speed. A new projectile moves in the tick
+        it is fired, after the enemies have, so t counts from the enemy's
+        position one tick back.
+        """
+        dx = target.position - target.speed - self.rect.centerx
+        dy = self.config.snapshot.world_height // 2 - self.rect.centery
+        speed = target.speed
+        a = speed * speed - self.projectile_speed * self.projectile_speed
+        b = 2 * dx * speed
+        c = dx * dx + dy * dy
+        if a == 0:
+            return -c / b if b < 0 else None
+        discriminant = b * b - 4 * a * c
+        if discriminant < 0:
+            return None
+        root = math.sqrt(discriminant)
+        times = [t for t in ((-b - root) / (2 * a), (-b + root) / (2 * a)) if t > 0]
+        return min(times) if times else None
+
+    def fire_analytic(self, target, moving_objects, current_time):
+        """Schedule the hit on target for the tick the projectile reaches it.
+
+        The projectile, if any, is only drawn; headless runs skip it.
+        """
+        flight_time = self.intercept_ticks(target)
+        if flight_time is None:
+            return
+        ticks = max(1, math.ceil(flight_time))
+        due = int(current_time + ticks * 1000 / self.config.snapshot.tick_rate)
+        self.schedule_hit(due, target.handle, moving_objects)
+        
+        if pygame.display.get_surface() is not None:
+            intercept_x = target.position + target.speed * (flight_time - 1)
+            args = (self.rect.centerx, self.rect.centery,
+                    intercept_x, self.config.snapshot.world_height // 2)
+            if self.pools is not None:
+                projectile = self.pools.projectiles.acquire()
+                projectile.reset(*args, speed=self.projectile_speed)
+            else:
+                projectile = Projectile(*args, self.resources, speed=self.projectile_speed)
+            projectile.ticks_left = ticks
+            self.projectiles.append(projectile)
+
+    def schedule_hit(self, due, handle, moving_objects):
+        hit = (due, handle)
+        self.pending_hits.append(hit)
+        self.scheduler.at(due, self.land_hit, hit, moving_objects)
+
+    def land_hit(self, hit, moving_objects):
+        self.pending_hits.remove(hit)
+        # The target may have been killed by another tower or leaked meanwhile
+        target = moving_objects.get(hit[1])
+        if target is not None and target.take_damage(self.damage):
+            moving_objects.remove(target)
+
+    def release(self, projectile):
+        if self.pools is not None:
+            self.pools.release(projectile)
 
     def shoot(self, target):
         # Calculate intercept point based on target speed
-        time_to_target = abs(target.position - self.rect.centerx) / 10  # projectile speed
+        time_to_target = abs(target.position - self.rect.centerx) / self.projectile_speed
         future_position = target.position + (target.speed * time_to_target)
         
         # Create projectile aimed at predicted position
-        projectile = Projectile(
+        args = (
             self.rect.centerx,
             self.rect.centery,
             future_position,
-            self.config.window_height // 2,
-            self.resources,
-            speed=10
+            self.config.snapshot.world_height // 2
         )
+        if self.pools is not None:
+            projectile = self.pools.projectiles.acquire()
+            projectile.reset(*args, speed=self.projectile_speed)
+        else:
+            projectile = Projectile(*args, self.resources, speed=self.projectile_speed)
+        projectile.target = target.handle
         self.projectiles.append(projectile)
+        self.wake()
 
-    def draw(self, surface):
-        # Draw tower
-        pygame.draw.rect(surface, self.color, self.rect)
-        pygame.draw.rect(surface, self.resources.get_color('BLACK'), self.rect, 2)
-        
-        # Draw selection highlight if selected
-        if self.selected:
-            highlight_rect = self.rect.inflate(4, 4)
-            pygame.draw.rect(surface, self.resources.get_color('GOLD'), highlight_rect, 2)
-            
-            # Draw range circle
-            pygame.draw.circle(surface, self.resources.get_color('BLUE'), 
-                             self.rect.center, self.range, 1)
+    def draw(self, surface, lag=0.0):
+        """Draw the tower and its projectiles, returning the list of Rects covered."""
+        rects = [draw_tower(surface, self.resources, self.rect, self.color, self.selected, self.range)]
         
         # Draw projectiles
         for projectile in self.projectiles:
-            projectile.draw(surface)
+            rects.append(projectile.draw(surface, lag))
+        return rects
 
     def start_drag(self, mouse_pos):
         self.is_dragging = True
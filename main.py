@@ -1,26 +1,95 @@
+import time
+STARTUP_BEGIN = time.perf_counter()  # before the heavy imports, for --startup-report
+
+import argparse
+import json
+import os
 import pygame
+import random
 import sys
-from config import GameConfig
+import traceback
+from functools import partial
+from config import get_config
 from resources import ResourceManager
 from world import GameWorld
 from ui import Button, Slider, Dialog
+from render import DirtyRectRenderer, EXPOSE_EVENTS
+from router import EventRouter
+from pool import EntityPools
+from profiler import FrameProfiler, StartupTimer
+from sim_thread import SimulationWorker, SnapshotView
+from scheduler import Scheduler
+from clock import WallClock, FixedStep
+import savegame
+
+QUICKSAVE_FILE = 'quicksave.sav'
+MOUSE_EVENTS = (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION)
+# Window state, expose and focus events stay in the queue even when nothing handles them
+WINDOW_EVENTS = (pygame.ACTIVEEVENT, pygame.VIDEOEXPOSE, pygame.VIDEORESIZE, pygame.WINDOWSHOWN,
+                 pygame.WINDOWHIDDEN, pygame.WINDOWEXPOSED, pygame.WINDOWMOVED, pygame.WINDOWRESIZED,
+                 pygame.WINDOWSIZECHANGED, pygame.WINDOWMINIMIZED, pygame.WINDOWMAXIMIZED,
+                 pygame.WINDOWRESTORED, pygame.WINDOWENTER, pygame.WINDOWLEAVE, pygame.WINDOWFOCUSGAINED,
+                 pygame.WINDOWFOCUSLOST, pygame.WINDOWCLOSE, pygame.WINDOWTAKEFOCUS,
+                 pygame.WINDOWDISPLAYCHANGED)
 
 class Game:
-    def __init__(self):
-        pygame.init()
-        self.config = GameConfig()
+    def __init__(self, seed=None, record_path=None, startup_report=False):
+        self.startup = StartupTimer(STARTUP_BEGIN)
+        self.startup_report = startup_report
+        self.starting = True
+        self.startup.mark('imports')
+        
+        # Only the subsystems the game uses; pygame.init() would also start audio and joysticks
+        pygame.display.init()
+        pygame.font.init()
+        self.startup.mark('pygame display and font')
+        self.config = get_config()
         self.resources = ResourceManager()
         
+        # Build the sprites while the START screen is up
+        self.startup.background['sprite warm-up'] = None
+        self.resources.warm_up_in_background(self.on_warm_up_done)
+        
         # Set up the display
-        self.screen = pygame.display.set_mode((self.config.window_width, self.config.window_height))
+        self.screen = self.canvas = None
+        self.create_display()
         pygame.display.set_caption(self.config.window_title)
+        self.startup.mark('display')
         self.clock = pygame.time.Clock()
+        self.ui_scheduler = Scheduler(WallClock())  # UI timeouts run on wall time
+        self.revert_timer = None
+        self.renderer = DirtyRectRenderer()
+        self.profiler = FrameProfiler()  # F3 toggles the overlay
+        self.profile_base = self.allocation_counts()  # totals at the end of the last profiled frame
         
-        # Create game world
-        self.world = GameWorld()
+        # Each game gets a known seed so its inputs can be recorded and replayed
+        self.seed = seed
+        self.record_path = record_path
+        self.recordings = 0
         
-        # Create UI elements
+        # Entity pools outlive individual worlds and are filled while the menu is up
+        self.pools = EntityPools(self.resources)
+        
+        # The world is built when a game starts and steps at its own fixed rate
+        self.world = None
+        self.stepper = None
+        self.steps = 0  # simulation steps run this frame
+        # With performance.simulation_thread the world steps on a worker and is drawn from snapshots
+        self.worker = None
+        self.world_view = None
+        self.snapshot = None
+        
+        # Create UI elements; events reach them through the router
+        self.event_handlers = {pygame.QUIT: lambda event: self.quit(), pygame.KEYDOWN: self.handle_key_down}
+        self.event_handlers.update(dict.fromkeys(EXPOSE_EVENTS, self.renderer.on_expose))
+        self.router = EventRouter()
+        self.router.on("GAME", self.handle_world_event,
+                       pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION)
         self.create_ui_elements()
+        self.allow_events()
+        self.startup.mark('ui')
+        self.layout_dirty = False
+        self.config.subscribe(self.on_config_changed)
         
         # Game state
         self.current_state = "START"
@@ -29,113 +98,247 @@ class Game:
     def create_ui_elements(self):
         # Create start button
         self.start_button = self.resources.create_button(
-            self.config.window_width//2 - 100,
-            self.config.window_height//2 - 25,
+            self.config.world_width//2 - 100,
+            self.config.world_height//2 - 25,
             200, 50, "Start", "BLUE"
         )
         
         # Create menu buttons
         self.menu_start = self.resources.create_button(
-            self.config.window_width//2 - int(self.config.window_width * 0.125),
-            self.config.window_height//2 - 100,
-            int(self.config.window_width * 0.25),
-            int(self.config.window_height * 0.08),
+            self.config.world_width//2 - int(self.config.world_width * 0.125),
+            self.config.world_height//2 - 100,
+            int(self.config.world_width * 0.25),
+            int(self.config.world_height * 0.08),
             "Start Game", "GREEN"
         )
         self.menu_settings = self.resources.create_button(
-            self.config.window_width//2 - int(self.config.window_width * 0.125),
-            self.config.window_height//2,
-            int(self.config.window_width * 0.25),
-            int(self.config.window_height * 0.08),
+            self.config.world_width//2 - int(self.config.world_width * 0.125),
+            self.config.world_height//2,
+            int(self.config.world_width * 0.25),
+            int(self.config.world_height * 0.08),
             "Settings", "BLUE"
         )
         self.menu_quit = self.resources.create_button(
-            self.config.window_width//2 - int(self.config.window_width * 0.125),
-            self.config.window_height//2 + 100,
-            int(self.config.window_width * 0.25),
-            int(self.config.window_height * 0.08),
+            self.config.world_width//2 - int(self.config.world_width * 0.125),
+            self.config.world_height//2 + 100,
+            int(self.config.world_width * 0.25),
+            int(self.config.world_height * 0.08),
             "Quit", "RED"
         )
         
         # Create settings buttons
         self.settings_back = self.resources.create_button(
-            self.config.window_width//2 - int(self.config.window_width * 0.15),
-            self.config.window_height - int(self.config.window_height * 0.1),
-            int(self.config.window_width * 0.15),
-            int(self.config.window_height * 0.08),
+            self.config.world_width//2 - int(self.config.world_width * 0.15),
+            self.config.world_height - int(self.config.world_height * 0.1),
+            int(self.config.world_width * 0.15),
+            int(self.config.world_height * 0.08),
             "Back", "BLUE"
         )
         self.settings_apply = self.resources.create_button(
-            self.config.window_width//2 + int(self.config.window_width * 0.01),
-            self.config.window_height - int(self.config.window_height * 0.1),
-            int(self.config.window_width * 0.15),
-            int(self.config.window_height * 0.08),
+            self.config.world_width//2 + int(self.config.world_width * 0.01),
+            self.config.world_height - int(self.config.world_height * 0.1),
+            int(self.config.world_width * 0.15),
+            int(self.config.world_height * 0.08),
             "Apply", "GREEN"
         )
         
         # Create resolution slider
         self.resolution_slider = self.resources.create_slider(
-            self.config.window_width//2 - int(self.config.window_width * 0.2),
-            self.config.window_height//2 - 50,
-            int(self.config.window_width * 0.4),
-            int(self.config.window_height * 0.03),
+            self.config.world_width//2 - int(self.config.world_width * 0.2),
+            self.config.world_height//2 - 50,
+            int(self.config.world_width * 0.4),
+            int(self.config.world_height * 0.03),
             600, 1920, self.config.window_width, "Resolution"
         )
         
         # Create game back button
         self.game_back = self.resources.create_button(
             20, 20,
-            int(self.config.window_width * 0.1),
-            int(self.config.window_height * 0.05),
+            int(self.config.world_width * 0.1),
+            int(self.config.world_height * 0.05),
             "Back", "BLUE"
         )
+        
+        # Route each state's clicks to its widgets
+        router = self.router
+        for state in ("START", "MENU", "SETTINGS", "GAME"):
+            router.clear(state)
+        router.add("START", self.start_button, partial(self.set_state, "MENU"))
+        router.add("MENU", self.menu_start, self.play)
+        router.add("MENU", self.menu_settings, partial(self.set_state, "SETTINGS"))
+        router.add("MENU", self.menu_quit, self.quit)
+        router.add("SETTINGS", self.resolution_slider)
+        router.add("SETTINGS", self.settings_back, partial(self.set_state, "MENU"))
+        router.add("SETTINGS", self.settings_apply, self.handle_resolution_change)
+        router.add("GAME", self.game_back, partial(self.set_state, "MENU"))
+
+    def create_world(self):
+        self.world_seed = self.seed if self.seed is not None else random.randrange(1 << 32)
+        world = GameWorld(rng=random.Random(self.world_seed), pools=self.pools)
+        world.profiler = self.profiler
+        return world
+
+    def start_game(self):
+        self.stop_worker()
+        self.stop_recording()
+        self.world = self.create_world()
+        self.stepper = FixedStep(1 / self.world.tick_rate, self.config.max_catch_up_steps)
+        if self.record_path:
+            from replay import ReplayWriter
+            self.recordings += 1
+            path = self.record_path
+            if self.recordings > 1:
+                root, ext = os.path.splitext(path)
+                path = f"{root}-{self.recordings}{ext}"
+            self.world.recorder = ReplayWriter(path, self.world_seed, self.config)
+        if self.config.simulation_thread:
+            self.start_worker()
+
+    def start_worker(self):
+        # The game's profiler is for the main thread only; spans still go to its trace, on their own track
+        self.world.profiler = FrameProfiler()
+        if self.profiler.tracer is not None:
+            self.world.profiler.attach_tracer(self.profiler.tracer)
+        self.worker = SimulationWorker(self.world, self.config.max_catch_up_steps)
+        self.world_view = SnapshotView(self.world, self.profiler)
+        self.snapshot = self.worker.latest
+        self.worker.start()
+
+    def stop_worker(self):
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker = None
+            self.world.profiler = self.profiler
+
+    def run_on_world(self, func, *args):
+        """Call func(*args) on the thread that owns the world, between ticks."""
+        if self.worker is not None:
+            self.worker.submit(func, *args)
+        else:
+            func(*args)
+
+    def on_warm_up_done(self, seconds):
+        self.startup.background['sprite warm-up'] = seconds
+
+    def stop_recording(self):
+        if self.world is not None and self.world.recorder is not None:
+            self.world.recorder.close(self.world.tick)
+            self.world.recorder = None
+
+    def quicksave(self):
+        self.run_on_world(savegame.save, self.world, QUICKSAVE_FILE)
+
+    def quickload(self):
+        # The dirty-rect renderer repaints in full once the loaded state is drawn (world.loads)
+        self.run_on_world(self.load_quicksave)
+
+    def load_quicksave(self):
+        try:
+            savegame.load(self.world, QUICKSAVE_FILE)
+        except (OSError, ValueError) as error:
+            print(f"Quickload failed: {error}")
+            return
+        # The replay can't follow a jump in state
+        self.stop_recording()
+        (self.worker.stepper if self.worker is not None else self.stepper).reset()
+
+    def on_config_changed(self, snapshot):
+        # Defer re-layout to the next update so back-to-back sets only rebuild once
+        self.layout_dirty = True
+
+    def create_display(self):
+        """Open the window and the canvas everything is drawn on.
+
+        With a render_resolution the canvas is an offscreen surface of that
+        size, scaled to the window once per presented frame; otherwise it is
+        the window itself.
+        """
+        size = (self.config.window_width, self.config.window_height)
+        if self.screen is None or self.screen.get_size() != size:
+            self.screen = pygame.display.set_mode(size)
+        resolution = self.config.render_resolution
+        if not resolution:
+            self.canvas = self.screen
+        elif self.canvas is None or self.canvas is self.screen or self.canvas.get_size() != tuple(resolution):
+            self.canvas = self.resources.create_surface(tuple(resolution)).convert()
+
+    def apply_layout(self):
+        self.layout_dirty = False
+        world_size = self.canvas.get_size() if self.screen is not None else None
+        self.create_display()
+        # A fixed render resolution keeps the world and UI coordinates when the window resizes
+        if self.canvas.get_size() != world_size or self.canvas is self.screen:
+            self.create_ui_elements()
+        self.renderer.invalidate()
+
+    def to_canvas(self, event):
+        """Return a mouse event with its position mapped from the window to the canvas."""
+        x, y = event.pos
+        window_width, window_height = self.screen.get_size()
+        canvas_width, canvas_height = self.canvas.get_size()
+        pos = (x * canvas_width // window_width, y * canvas_height // window_height)
+        return pygame.event.Event(event.type, event.dict, pos=pos)
 
     def handle_events(self):
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.running = False
-            
-            if self.current_state == "START":
-                if self.start_button.handle_event(event):
-                    self.current_state = "MENU"
-            
-            elif self.current_state == "MENU":
-                if self.menu_start.handle_event(event):
-                    self.current_state = "GAME"
-                    self.world = GameWorld()  # Reset game world
-                elif self.menu_settings.handle_event(event):
-                    self.current_state = "SETTINGS"
-                elif self.menu_quit.handle_event(event):
-                    self.running = False
-            
-            elif self.current_state == "SETTINGS":
-                self.resolution_slider.handle_event(event)
-                if self.settings_back.handle_event(event):
-                    self.current_state = "MENU"
-                elif self.settings_apply.handle_event(event):
-                    self.handle_resolution_change()
-            
-            elif self.current_state == "GAME":
-                if self.game_back.handle_event(event):
-                    self.current_state = "MENU"
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    self.world.handle_mouse_down(event)
-                elif event.type == pygame.MOUSEBUTTONUP:
-                    self.world.handle_mouse_up(event)
-                elif event.type == pygame.MOUSEMOTION:
-                    self.world.handle_mouse_motion(event)
-            
-            elif self.current_state == "CONFIRMATION":
-                result = self.confirmation_dialog.handle_event(event)
-                if result == "confirm":
-                    self.current_state = "SETTINGS"
-                elif result == "cancel" or self.confirmation_dialog.should_revert():
-                    # Revert resolution
-                    self.config.set('window', 'width', self.old_width)
-                    self.config.set('window', 'height', self.old_height)
-                    self.screen = pygame.display.set_mode((self.old_width, self.old_height))
-                    self.create_ui_elements()  # Recreate UI elements with old resolution
-                    self.current_state = "SETTINGS"
+        scaled = self.canvas is not self.screen
+        handlers = self.event_handlers
+        router = self.router
+        events = pygame.event.get()
+        last = len(events) - 1
+        for i, event in enumerate(events):
+            # Only the last of a run of motion events matters, e.g. one placement check per frame while dragging
+            if event.type == pygame.MOUSEMOTION and i < last and events[i + 1].type == pygame.MOUSEMOTION:
+                continue
+            if scaled and event.type in MOUSE_EVENTS:
+                event = self.to_canvas(event)
+            handler = handlers.get(event.type)
+            if handler is not None:
+                handler(event)
+            router.route(self.current_state, event)
+
+    def handle_key_down(self, event):
+        if event.key == pygame.K_F3:
+            self.toggle_profiler()
+        elif self.current_state == "GAME":
+            if event.key == pygame.K_F5:
+                self.quicksave()
+            elif event.key == pygame.K_F9:
+                self.quickload()
+
+    def handle_world_event(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            self.run_on_world(self.world.handle_mouse_down, event)
+        elif event.type == pygame.MOUSEBUTTONUP:
+            self.run_on_world(self.world.handle_mouse_up, event)
+        elif event.type == pygame.MOUSEMOTION:
+            self.run_on_world(self.world.handle_mouse_motion, event)
+
+    def allow_events(self):
+        """Keep event types nothing handles out of the queue, except the window's own."""
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(sorted(set(self.event_handlers) | self.router.event_types() | set(WINDOW_EVENTS)))
+
+    def set_state(self, state):
+        self.current_state = state
+
+    def play(self):
+        self.current_state = "GAME"
+        self.start_game()  # Reset game world
+
+    def quit(self):
+        self.running = False
+
+    def confirm_resolution(self):
+        self.ui_scheduler.cancel(self.revert_timer)
+        self.current_state = "SETTINGS"
+
+    def revert_resolution(self):
+        self.ui_scheduler.cancel(self.revert_timer)
+        if self.current_state != "CONFIRMATION":
+            return
+        self.config.set_many({'window': {'width': self.old_width, 'height': self.old_height}})
+        self.apply_layout()  # Recreate UI elements with old resolution
+        self.current_state = "SETTINGS"
 
     def handle_resolution_change(self):
         new_width = int(self.resolution_slider.value)
@@ -146,17 +349,17 @@ class Game:
         old_height = self.config.window_height
         
         # Update config
-        self.config.set('window', 'width', new_width)
-        self.config.set('window', 'height', new_height)
+        self.config.set_many({'window': {'width': new_width, 'height': new_height}})
         
         # Update display
-        self.screen = pygame.display.set_mode((new_width, new_height))
+        self.apply_layout()
         
-        # Create confirmation dialog
-        dialog_height = int(new_height * 0.3)
+        # Create confirmation dialog, centred on the canvas
+        view_width, view_height = self.canvas.get_size()
+        dialog_height = int(view_height * 0.3)
         self.confirmation_dialog = self.resources.create_dialog(
-            new_width//2 - 250,
-            new_height//2 - dialog_height//2,
+            view_width//2 - 250,
+            view_height//2 - dialog_height//2,
             500,
             dialog_height,
             "Confirm Resolution Change",
@@ -164,53 +367,254 @@ class Game:
             "Keep Changes",
             "Revert"
         )
+        self.router.clear("CONFIRMATION")
+        self.router.add("CONFIRMATION", self.confirmation_dialog.confirm_button, self.confirm_resolution)
+        self.router.add("CONFIRMATION", self.confirmation_dialog.cancel_button, self.revert_resolution)
         
         self.current_state = "CONFIRMATION"
         
-        # Store old resolution for potential revert
+        # Store old resolution for potential revert, which happens on its own after a timeout
         self.old_width = old_width
         self.old_height = old_height
+        self.revert_timer = self.ui_scheduler.after(self.confirmation_dialog.revert_time,
+                                                    self.revert_resolution)
 
-    def update(self):
-        if self.current_state == "GAME":
-            if self.world.update():
+    def update(self, elapsed):
+        """Advance everything by elapsed seconds of real time."""
+        self.config.reload_if_changed()
+        self.ui_scheduler.run_due()
+        if self.layout_dirty:
+            self.apply_layout()
+        if self.worker is not None and self.current_state != "GAME":
+            self.stop_worker()  # left the game; the world pauses like it does without a worker
+        
+        if self.current_state in ("START", "MENU"):
+            self.pools.prewarm()
+        elif self.worker is not None:
+            # Pick up the latest snapshot; the worker keeps stepping meanwhile
+            snapshot = self.worker.latest
+            self.steps = snapshot.tick - self.snapshot.tick
+            self.snapshot = snapshot
+            if snapshot.error is not None:
+                # The world is in an unknown state; report why and leave the game
+                print("Simulation thread failed:")
+                traceback.print_exception(snapshot.error)
+            if snapshot.game_over or snapshot.error is not None:
+                self.stop_worker()
+                self.stop_recording()
                 self.current_state = "MENU"
+        elif self.current_state == "GAME":
+            # Run as many fixed steps as real time calls for, then draw in between ticks
+            self.steps = self.stepper.advance(elapsed)
+            for _ in range(self.steps):
+                with self.profiler.span('world update', tick=self.world.tick):
+                    game_over = self.world.update()
+                if game_over:
+                    self.stop_recording()
+                    self.current_state = "MENU"
+                    break
+            self.world.alpha = self.stepper.alpha
+
+    def state_widgets(self):
+        """Return the widgets shown in the current state, in draw order."""
+        if self.current_state == "START":
+            return [self.start_button]
+        elif self.current_state == "MENU":
+            return [self.menu_start, self.menu_settings, self.menu_quit]
+        elif self.current_state == "SETTINGS":
+            return [self.resolution_slider, self.settings_back, self.settings_apply]
+        elif self.current_state == "GAME":
+            return [self.game_back]
+        elif self.current_state == "CONFIRMATION":
+            return [self.confirmation_dialog]
+        return []
+
+    def build_background(self, size):
+        background = self.resources.create_surface(size).convert()
+        background.fill(self.resources.get_color('WHITE'))
+        if self.current_state == "GAME" and self.worker is not None:
+            self.world_view.draw_static(background, self.snapshot)
+        elif self.current_state == "GAME":
+            self.world.draw_static(background)
+        return background
 
     def draw(self):
-        self.screen.fill(self.resources.get_color('WHITE'))
+        if self.config.snapshot.dirty_rects:
+            self.draw_dirty()
+            return
+        
+        self.canvas.fill(self.resources.get_color('WHITE'))
         
         if self.current_state == "START":
-            self.start_button.draw(self.screen)
+            self.start_button.draw(self.canvas)
         
         elif self.current_state == "MENU":
-            self.menu_start.draw(self.screen)
-            self.menu_settings.draw(self.screen)
-            self.menu_quit.draw(self.screen)
+            self.menu_start.draw(self.canvas)
+            self.menu_settings.draw(self.canvas)
+            self.menu_quit.draw(self.canvas)
         
         elif self.current_state == "SETTINGS":
-            self.resolution_slider.draw(self.screen)
-            self.settings_back.draw(self.screen)
-            self.settings_apply.draw(self.screen)
+            self.resolution_slider.draw(self.canvas)
+            self.settings_back.draw(self.canvas)
+            self.settings_apply.draw(self.canvas)
         
         elif self.current_state == "GAME":
-            self.world.draw(self.screen)
-            self.game_back.draw(self.screen)
+            if self.worker is not None:
+                self.world_view.draw(self.canvas, self.snapshot, self.snapshot_lag())
+            else:
+                self.world.draw(self.canvas)
+            self.game_back.draw(self.canvas)
         
         elif self.current_state == "CONFIRMATION":
-            self.confirmation_dialog.draw(self.screen)
+            self.confirmation_dialog.draw(self.canvas)
+        
+        if self.profiler.enabled:
+            self.profiler.draw(self.canvas, self.resources)
         
+        with self.profiler.phase('flip'):
+            self.present()
+
+    def draw_dirty(self):
+        if self.current_state == "GAME" and self.worker is not None:
+            # The worker may switch layouts or load a save between frames
+            scene = (self.current_state, id(self.world), self.snapshot.loads, id(self.snapshot.layout))
+        elif self.current_state == "GAME":
+            scene = (self.current_state, id(self.world), self.world.loads)
+        else:
+            scene = (self.current_state, id(self.state_widgets()[0]))
+        self.renderer.render(self.canvas, scene, self.build_background,
+                             self.state_widgets(), self.draw_dynamic)
+        with self.profiler.phase('flip'):
+            if self.canvas is self.screen:
+                self.renderer.present()
+            elif self.renderer.full_frame or self.renderer.last_update_rects:
+                self.present()
+
+    def present(self):
+        if self.canvas is not self.screen:
+            # One scaling pass from the canvas to the whole window
+            pygame.transform.scale(self.canvas, self.screen.get_size(), self.screen)
         pygame.display.flip()
 
+    def draw_dynamic(self, surface, background):
+        rects = []
+        if self.current_state == "GAME":
+            if self.worker is not None:
+                rects = self.world_view.draw_dynamic(surface, background, self.snapshot, self.snapshot_lag())
+            else:
+                rects = self.world.draw_dynamic(surface, background)
+        if self.profiler.enabled:
+            rects.append(self.profiler.draw(surface, self.resources))
+        return rects
+
+    def snapshot_lag(self):
+        """How many ticks the frame being drawn lies behind the snapshot's tick."""
+        step_seconds = self.worker.stepper.step_seconds
+        return 1.0 - min(1.0, (time.perf_counter() - self.snapshot.time) / step_seconds)
+
+    def toggle_profiler(self):
+        self.profiler.toggle()
+
+    def allocation_counts(self):
+        """Running totals of text renders and of all surfaces created: by the caches and directly."""
+        resources = self.resources
+        text_renders = resources.text.renders
+        return text_renders, resources.sprites.misses + text_renders + resources.surfaces.created
+
+    def frame_counters(self):
+        text_renders, surfaces = self.allocation_counts()
+        if self.profiler.frames == 0:
+            # First frame since the profiler was enabled, however that happened
+            self.profile_base = (text_renders, surfaces)
+        base_text, base_surfaces = self.profile_base
+        self.profile_base = (text_renders, surfaces)
+        if self.current_state == "GAME" and self.worker is not None:
+            enemies = len(self.snapshot.enemies)
+            projectiles = sum(len(tower[-1]) for tower in self.snapshot.towers)
+        elif self.current_state == "GAME":
+            enemies = len(self.world.moving_objects)
+            projectiles = sum(len(tower.projectiles) for tower in self.world.towers)
+        else:
+            enemies = projectiles = 0
+        return {
+            'enemies': enemies,
+            'projectiles': projectiles,
+            'sim steps/frame': self.steps if self.current_state == "GAME" else 0,
+            'text renders/frame': text_renders - base_text,
+            'surface allocs/frame': surfaces - base_surfaces,
+        }
+
+    def finish_startup(self):
+        self.starting = False
+        self.startup.mark('first frame')
+        # Fonts the START screen didn't need; after the first frame, as fonts stay on this thread
+        self.resources.warm_up_fonts()
+        if self.startup_report:
+            print(self.startup.report())
+
     def run(self):
+        profiler = self.profiler
+        previous = time.perf_counter()
         while self.running:
-            self.handle_events()
-            self.update()
-            self.draw()
-            self.clock.tick(self.config.fps)
+            profiler.begin_frame()
+            now = time.perf_counter()
+            elapsed, previous = now - previous, now
+            with profiler.phase('events'):
+                self.handle_events()
+            with profiler.phase('update'):
+                self.update(elapsed)
+            with profiler.phase('draw'):
+                self.draw()
+            if self.starting:
+                self.finish_startup()
+            with profiler.phase('wait'):
+                self.clock.tick(self.config.fps)
+            if profiler.active:
+                profiler.end_frame(self.frame_counters() if profiler.enabled else None)
 
+        self.stop_worker()  # before the trace closes; the worker records into it
+        profiler.close()
+        self.stop_recording()
+        self.config.flush()
         pygame.quit()
         sys.exit()
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Tower Defense Game")
+    parser.add_argument('--headless', action='store_true',
+                        help="run the simulation without a window and print the final state")
+    parser.add_argument('--ticks', type=int, default=3600, help="ticks to simulate when headless")
+    parser.add_argument('--seed', type=int, default=None, help="RNG seed for a reproducible run")
+    parser.add_argument('--trace', metavar='PATH',
+                        help="record frame phases as a Chrome trace-event JSON file")
+    parser.add_argument('--record', metavar='PATH',
+                        help="record each game's inputs to a replay file (see replay.py)")
+    parser.add_argument('--startup-report', action='store_true',
+                        help="print time to first frame broken down by startup phase")
+    parser.add_argument('--cprofile', metavar='PATH', help="run under cProfile and write pstats to PATH")
+    return parser.parse_args(argv)
+
+def run_headless(args):
+    from simulation import init_headless, run_headless as simulate
+    init_headless()
+    world = simulate(args.ticks, args.seed)
+    print(json.dumps(world.state_summary(), indent=4))
+
 if __name__ == "__main__":
-    game = Game()
-    game.run() 
\ No newline at end of file
+    args = parse_args()
+    if args.headless:
+        run_headless(args)
+    else:
+        game = Game(args.seed, args.record, args.startup_report)
+        if args.trace:
+            from tracing import TraceRecorder
+            game.profiler.attach_tracer(TraceRecorder(args.trace))
+        if args.cprofile:
+            import cProfile
+            profile = cProfile.Profile()
+            try:
+                profile.runcall(game.run)
+            finally:
+                profile.dump_stats(args.cprofile)
+        else:
+            game.run()
@@ -0,0 +1,72 @@
+from config import get_config
+from entities import MovingObject, Projectile
+
+class ObjectPool:
+    """Free list of reusable objects.
+
+    Objects come back with whatever state they were released in; callers
+    reset them in place after acquire(). At most high_water objects are
+    kept on the free list, the rest are left to the garbage collector.
+    """
+    def __init__(self, factory, high_water):
+        self.factory = factory
+        self.high_water = high_water
+        self.free = []
+        self.hits = 0
+        self.overflows = 0  # acquires that had to allocate
+        self.discards = 0  # releases dropped because the pool was full
+
+    def acquire(self):
+        if self.free:
+            self.hits += 1
+            return self.free.pop()
+        self.overflows += 1
+        return self.factory()
+
+    def release(self, obj):
+        if len(self.free) < self.high_water:
+            self.free.append(obj)
+        else:
+            self.discards += 1
+
+    def prewarm(self, budget):
+        """Allocate up to budget objects toward high_water; return True once full."""
+        for _ in range(min(budget, self.high_water - len(self.free))):
+            self.free.append(self.factory())
+        return len(self.free) >= self.high_water
+
+    def stats(self):
+        return {
+            'free': len(self.free),
+            'high_water': self.high_water,
+            'hits': self.hits,
+            'overflows': self.overflows,
+            'discards': self.discards
+        }
+
+class EntityPools:
+    """Enemy and projectile pools shared by every GameWorld in a session."""
+    def __init__(self, resource_manager):
+        config = get_config()
+        self.enemies = ObjectPool(lambda: MovingObject(0, resource_manager), config.enemy_pool_size)
+        self.projectiles = ObjectPool(
+            lambda: Projectile(0, 0, 0, 0, resource_manager), config.projectile_pool_size
+        )
+
+    def release(self, entity):
+        if isinstance(entity, MovingObject):
+            self.enemies.release(entity)
+        else:
+            self.projectiles.release(entity)
+
+    def prewarm(self, budget=100):
+        """Fill the pools a little at a time, e.g. once per menu frame."""
+        enemies_full = self.enemies.prewarm(budget)
+        projectiles_full = self.projectiles.prewarm(budget)
+        return enemies_full and projectiles_full
+
+    def stats(self):
+        return {
+            'enemies': self.enemies.stats(),
+            'projectiles': self.projectiles.stats()
+        }
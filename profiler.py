@@ -0,0 +1,214 @@
+import pygame
+from collections import deque
+from contextlib import nullcontext
+from time import perf_counter
+
+# Shared do-nothing context handed out while profiling is off
+_NULL_PHASE = nullcontext()
+
+class _Phase:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        duration = perf_counter() - self.start
+        self.profiler.add(self.name, duration)
+        if self.profiler.tracer is not None:
+            self.profiler.tracer.complete(self.name, self.start, duration)
+        return False
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.complete(self.name, self.start, perf_counter() - self.start, self.args)
+        return False
+
+class FrameProfiler:
+    """Times named phases of each frame and keeps rolling percentiles.
+
+    Wrap work in `with profiler.phase('update'):` and bracket each frame
+    with begin_frame()/end_frame(counters). With a tracer attached, every
+    phase and frame is also recorded as a trace span, and span() adds
+    finer trace-only spans. While neither is on, phase() and span() return
+    a shared null context and the frame calls return immediately, so the
+    instrumentation costs one attribute check per call site.
+    """
+    def __init__(self, window=240, refresh_frames=30):
+        self.enabled = False
+        self.tracer = None
+        self.active = False  # enabled or tracing
+        self.window = window
+        self.refresh_frames = refresh_frames  # overlay text is rebuilt this often
+        self.frame_start = None
+        self.current = {}
+        self.phase_times = {}
+        self.frame_times = deque(maxlen=window)
+        self.counters = {}
+        self.frames = 0
+        self.overlay_lines = []
+        self.panel = None
+
+    def enable(self):
+        if not self.enabled:
+            self.reset()  # stats start over each time the profiler is switched on
+        self.enabled = True
+        self.active = True
+
+    def disable(self):
+        self.enabled = False
+        self.active = self.tracer is not None
+        if not self.active:
+            self.frame_start = None
+
+    def attach_tracer(self, tracer):
+        """Also record phases and spans to tracer (a tracing.TraceRecorder)."""
+        self.tracer = tracer
+        self.active = True
+
+    def close(self):
+        """Detach and close the tracer, if any."""
+        if self.tracer is not None:
+            self.tracer.close()
+            self.tracer = None
+            self.active = self.enabled
+
+    def toggle(self):
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+        return self.enabled
+
+    def reset(self):
+        self.current.clear()
+        self.phase_times.clear()
+        self.frame_times.clear()
+        self.counters = {}
+        self.frames = 0
+        self.overlay_lines = []
+
+    def phase(self, name):
+        """Context manager timing one phase of the current frame."""
+        if not self.active:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def span(self, name, **args):
+        """Context manager recording a trace-only span; no-op unless tracing."""
+        if self.tracer is None:
+            return _NULL_PHASE
+        return _Span(self.tracer, name, args)
+
+    def add(self, name, seconds):
+        self.current[name] = self.current.get(name, 0.0) + seconds
+
+    def begin_frame(self):
+        if not self.active:
+            return
+        self.frame_start = perf_counter()
+        self.current.clear()
+
+    def end_frame(self, counters=None):
+        """Close the frame opened by begin_frame(); counters is a dict of live values."""
+        if not self.active or self.frame_start is None:
+            return
+        duration = perf_counter() - self.frame_start
+        if self.tracer is not None:
+            self.tracer.complete('frame', self.frame_start, duration)
+        if not self.enabled:
+            return
+        self.frame_times.append(duration)
+        for name, seconds in self.current.items():
+            times = self.phase_times.get(name)
+            if times is None:
+                times = self.phase_times[name] = deque(maxlen=self.window)
+            times.append(seconds)
+        if counters is not None:
+            self.counters = counters
+        self.frames += 1
+        if self.frames % self.refresh_frames == 1 or not self.overlay_lines:
+            self.overlay_lines = self.format_lines()
+
+    def stats(self):
+        """Return frame and per-phase p50/p99 in milliseconds plus the latest counters."""
+        return {
+            'frames': self.frames,
+            'frame': percentiles(self.frame_times),
+            'phases': {name: percentiles(times) for name, times in self.phase_times.items()},
+            'counters': dict(self.counters),
+        }
+
+    def format_lines(self):
+        stats = self.stats()
+        frame = stats['frame']
+        lines = [f"frame  p50 {frame['p50_ms']:6.2f}  p99 {frame['p99_ms']:6.2f} ms"]
+        for name, phase in stats['phases'].items():
+            lines.append(f"{name:6s} p50 {phase['p50_ms']:6.2f}  p99 {phase['p99_ms']:6.2f} ms")
+        for name, value in stats['counters'].items():
+            lines.append(f"{name}: {value}")
+        return lines
+
+    def draw(self, surface, resources, pos=(20, 80)):
+        """Draw the overlay and return the Rect it covered."""
+        line_height = 18
+        color = resources.get_color('BLACK')
+        texts = [resources.render_text(18, line, color) for line in self.overlay_lines]
+        width = max((text.get_width() for text in texts), default=0) + 12
+        rect = pygame.Rect(pos, (width, line_height * len(texts) + 8))
+        if self.panel is None or self.panel.get_size() != rect.size:
+            self.panel = resources.create_surface(rect.size, pygame.SRCALPHA)
+            self.panel.fill((255, 255, 255, 200))
+        surface.blit(self.panel, rect)
+        for i, text in enumerate(texts):
+            surface.blit(text, (rect.x + 6, rect.y + 4 + i * line_height))
+        return rect
+
+def percentiles(values):
+    if not values:
+        return {'p50_ms': 0.0, 'p99_ms': 0.0}
+    ordered = sorted(values)
+    last = len(ordered) - 1
+    return {
+        'p50_ms': ordered[round(0.50 * last)] * 1000,
+        'p99_ms': ordered[round(0.99 * last)] * 1000,
+    }
+
+class StartupTimer:
+    """Wall time of consecutive startup phases, for --startup-report."""
+    def __init__(self, start=None):
+        self.start = self.last = start if start is not None else perf_counter()
+        self.phases = []
+        self.background = {}  # name -> seconds, for work done off the main thread
+
+    def mark(self, name):
+        """Close the phase that ran since the previous mark."""
+        now = perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def report(self):
+        lines = [f"{name:24s} {seconds * 1000:8.1f} ms" for name, seconds in self.phases]
+        lines.append(f"{'time to first frame':24s} {(self.last - self.start) * 1000:8.1f} ms")
+        for name, seconds in self.background.items():
+            if seconds is None:
+                lines.append(f"{name:24s}   (still running)")
+            else:
+                lines.append(f"{name:24s} {seconds * 1000:8.1f} ms (background)")
+        return '\n'.join(lines)
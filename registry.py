@@ -0,0 +1,86 @@
+class EntityRegistry:
+    """Dense entity storage addressed by generational handles.
+
+    add() returns a (slot, generation) handle and also stores it on the
+    entity as entity.handle. Destroying an entity bumps its slot's
+    generation, so every outstanding handle to it resolves to None right
+    away and a second destroy is a harmless no-op. The entity itself stays
+    in the dense list until flush(), which swap-removes all pending entries
+    in O(1) each; call it once at the end of a tick.
+    """
+    def __init__(self):
+        self.entities = []  # dense, iteration order
+        self.slots = []  # dense index -> slot
+        self.dense_index = []  # slot -> dense index
+        self.generations = []  # slot -> current generation
+        self.free_slots = []
+        self.pending = []  # slots destroyed this tick
+
+    def add(self, entity):
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            slot = len(self.generations)
+            self.generations.append(0)
+            self.dense_index.append(-1)
+        self.dense_index[slot] = len(self.entities)
+        self.entities.append(entity)
+        self.slots.append(slot)
+        entity.handle = (slot, self.generations[slot])
+        return entity.handle
+
+    def get(self, handle):
+        """Return the entity for handle, or None if it has been destroyed."""
+        slot, generation = handle
+        if self.generations[slot] != generation:
+            return None
+        return self.entities[self.dense_index[slot]]
+
+    def destroy(self, handle):
+        """Schedule the entity for removal at the next flush(); return False if already gone."""
+        slot, generation = handle
+        if self.generations[slot] != generation:
+            return False
+        self.generations[slot] += 1
+        self.pending.append(slot)
+        return True
+
+    def remove(self, entity):
+        """list.remove() counterpart: deferred and safe to call twice."""
+        return self.destroy(entity.handle)
+
+    def flush(self):
+        """Swap-remove every entity destroyed since the last flush and return them."""
+        destroyed = []
+        for slot in self.pending:
+            index = self.dense_index[slot]
+            destroyed.append(self.entities[index])
+            last = self.entities.pop()
+            last_slot = self.slots.pop()
+            if index < len(self.entities):
+                self.entities[index] = last
+                self.slots[index] = last_slot
+                self.dense_index[last_slot] = index
+            self.dense_index[slot] = -1
+            self.free_slots.append(slot)
+        self.pending.clear()
+        return destroyed
+
+    def clear(self):
+        for slot in self.slots:
+            self.generations[slot] += 1
+            self.dense_index[slot] = -1
+            self.free_slots.append(slot)
+        self.entities.clear()
+        self.slots.clear()
+        self.pending.clear()
+
+    def __iter__(self):
+        """Iterate live entities; entities destroyed this tick are skipped."""
+        if not self.pending:
+            return iter(self.entities)
+        generations = self.generations
+        return (entity for entity in self.entities if generations[entity.handle[0]] == entity.handle[1])
+
+    def __len__(self):
+        return len(self.entities) - len(self.pending)
@@ -0,0 +1,97 @@
+import pygame
+
+# The window's contents may have been lost; the next frame must repaint all of it
+EXPOSE_EVENTS = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWSHOWN, pygame.WINDOWRESTORED,
+                 pygame.WINDOWMAXIMIZED, pygame.WINDOWFOCUSGAINED, pygame.ACTIVEEVENT)
+
+class DirtyRectRenderer:
+    """Redraws and presents only the parts of the screen that changed.
+
+    Each scene (a game state) has a cached background. Every frame the
+    areas drawn by dynamic content last frame are erased from it, widgets
+    that changed or were overlapped are redrawn, and only the union of those
+    rects is pushed with pygame.display.update(). A scene change, resize or
+    invalidate() falls back to one full redraw and flip(). render() only
+    draws; present() pushes the result so the two can be timed apart.
+    """
+    def __init__(self):
+        self.scene = None
+        self.background = None
+        self.previous_rects = []
+        self.widget_rects = {}
+        self.last_update_rects = []
+        self.full_frame = False
+
+    def invalidate(self):
+        """Force a full redraw on the next frame."""
+        self.scene = None
+
+    def on_expose(self, event):
+        """Handler for EXPOSE_EVENTS."""
+        self.invalidate()
+
+    def render(self, screen, scene, build_background, widgets, draw_dynamic=None):
+        """Draw one frame.
+
+        build_background(size) returns the static background surface for the
+        scene. draw_dynamic(surface, background), if given, draws the moving
+        content and returns the Rects it covered. Widgets must have a dirty
+        flag and return their covered Rect from draw().
+        """
+        screen_rect = screen.get_rect()
+        if scene != self.scene or self.background.get_size() != screen_rect.size:
+            self.scene = scene
+            self.background = build_background(screen_rect.size)
+            self.full_redraw(screen, widgets, draw_dynamic)
+            return
+        self.full_frame = False
+
+        background = self.background
+        dirty = []
+
+        # Erase last frame's dynamic content
+        for rect in self.previous_rects:
+            screen.blit(background, rect, rect)
+        dirty.extend(self.previous_rects)
+
+        # Clear widgets that changed so their old footprint doesn't linger
+        for widget in widgets:
+            old = self.widget_rects.get(widget)
+            if widget.dirty and old is not None:
+                screen.blit(background, old, old)
+                dirty.append(old)
+
+        current = self.clip(draw_dynamic(screen, background), screen_rect) if draw_dynamic else []
+        dirty.extend(current)
+
+        # Widgets sit on top: redraw any that changed or were touched this frame
+        for widget in widgets:
+            old = self.widget_rects.get(widget)
+            if widget.dirty or old is None or old.collidelist(dirty) != -1:
+                rect = widget.draw(screen).clip(screen_rect)
+                self.widget_rects[widget] = rect
+                dirty.append(rect)
+
+        self.previous_rects = current
+        self.last_update_rects = dirty
+
+    def full_redraw(self, screen, widgets, draw_dynamic):
+        screen_rect = screen.get_rect()
+        screen.blit(self.background, (0, 0))
+        if draw_dynamic:
+            self.previous_rects = self.clip(draw_dynamic(screen, self.background), screen_rect)
+        else:
+            self.previous_rects = []
+        self.widget_rects = {widget: widget.draw(screen).clip(screen_rect) for widget in widgets}
+        self.last_update_rects = [screen_rect]
+        self.full_frame = True
+
+    def present(self):
+        """Push the frame drawn by the last render() to the display."""
+        if self.full_frame:
+            pygame.display.flip()
+        elif self.last_update_rects:
+            pygame.display.update(self.last_update_rects)
+
+    def clip(self, rects, screen_rect):
+        return [rect.clip(screen_rect) for rect in rects]
@@ -0,0 +1,180 @@
+"""Record world inputs to a compact binary file and play them back.
+
+Play a recording back headless, as fast as the CPU allows:
+    python replay.py session.tdr
+or rendered, at a multiple of normal speed:
+    python replay.py session.tdr --render --speed 2
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+
+MAGIC = b'TDRP'
+VERSION = 2
+# magic, version, world seed, length of the JSON settings blob that follows
+HEADER = struct.Struct('<4sHQI')
+# tick, action | button << 2, x, y: 9 bytes per input
+RECORD = struct.Struct('<IBhh')
+
+# Actions
+END = 0
+MOUSE_DOWN = 1
+MOUSE_UP = 2
+MOUSE_MOTION = 3
+
+# Settings that change the simulation and must match on playback
+RECORDED_SETTINGS = {
+    'window': ('width', 'height', 'fps'),
+    'game': ('starting_health', 'starting_balance', 'tower_cost', 'object_speed', 'object_spawn_rate',
+             'tick_rate'),
+    'performance': ('hit_resolution', 'render_resolution'),
+}
+
+class ReplayWriter:
+    """Appends world inputs, stamped with the world tick, to a replay file.
+
+    GameWorld calls record() from its mouse handlers only while a writer
+    is attached, so an idle session costs nothing per frame.
+    """
+    def __init__(self, path, seed, config):
+        settings = {category: {key: config.get(category, key) for key in keys}
+                    for category, keys in RECORDED_SETTINGS.items()}
+        blob = json.dumps(settings).encode()
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed, len(blob)))
+        self.file.write(blob)
+        self.records = 0
+
+    def record(self, action, tick, event):
+        x, y = event.pos
+        button = getattr(event, 'button', 0)
+        self.file.write(RECORD.pack(tick, action | button << 2, x, y))
+        self.records += 1
+
+    def close(self, tick):
+        """Write the end marker with the last tick and close the file."""
+        if self.file.closed:
+            return
+        self.file.write(RECORD.pack(tick, END, 0, 0))
+        self.file.close()
+
+class Replay:
+    """A loaded replay: seed, recorded settings and (tick, action, button, pos) inputs."""
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, self.seed, blob_length = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a replay file")
+        if version not in (1, VERSION):
+            raise ValueError(f"{path} has replay version {version}, expected {VERSION}")
+        offset = HEADER.size + blob_length
+        self.settings = json.loads(data[HEADER.size:offset])
+        if version == 1:
+            # Recorded before speeds were per second and the tick rate was its own setting
+            from config import migrate_settings
+            migrate_settings(self.settings)
+            del self.settings['version']
+        usable = len(data) - (len(data) - offset) % RECORD.size
+        self.inputs = []
+        self.end_tick = None
+        for tick, packed, x, y in RECORD.iter_unpack(data[offset:usable]):
+            action = packed & 3
+            if action == END:
+                self.end_tick = tick
+                break
+            self.inputs.append((tick, action, packed >> 2, (x, y)))
+        if self.end_tick is None:
+            # Cut short, e.g. by a crash: play up to the last input
+            self.end_tick = self.inputs[-1][0] + 1 if self.inputs else 0
+
+def create_world(replay, enemy_storage=None):
+    """Apply the recorded settings and build the world the recording started from."""
+    from config import get_config
+    from simulation import create_world as create_seeded_world
+    get_config().override(replay.settings)
+    return create_seeded_world(replay.seed, enemy_storage)
+
+def apply_input(world, action, button, pos):
+    import pygame
+    if action == MOUSE_DOWN:
+        world.handle_mouse_down(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=button))
+    elif action == MOUSE_UP:
+        world.handle_mouse_up(pygame.event.Event(pygame.MOUSEBUTTONUP, pos=pos, button=button))
+    elif action == MOUSE_MOTION:
+        world.handle_mouse_motion(pygame.event.Event(pygame.MOUSEMOTION, pos=pos))
+
+def play(replay, world, on_tick=None):
+    """Feed the inputs to world tick by tick until the recording ends or the game is over.
+
+    Inputs stamped with tick t are applied before the update that advances
+    the world past t, as Game does. on_tick(world), if given, runs after
+    each update, e.g. to draw.
+    """
+    inputs = replay.inputs
+    next_input = 0
+    while world.tick < replay.end_tick:
+        while next_input < len(inputs) and inputs[next_input][0] <= world.tick:
+            _, action, button, pos = inputs[next_input]
+            apply_input(world, action, button, pos)
+            next_input += 1
+        game_over = world.update()
+        if on_tick is not None and on_tick(world) is False:
+            break
+        if game_over:
+            break
+    return world
+
+def play_rendered(replay, world, speed):
+    import pygame
+    screen = pygame.display.set_mode(world.layout.size)
+    pygame.display.set_caption("Replay")
+    clock = pygame.time.Clock()
+    fps = world.tick_rate * speed
+
+    def draw(world):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+        world.draw(screen)
+        pygame.display.flip()
+        clock.tick(fps)
+        return True
+
+    return play(replay, world, draw)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('replay', help="replay file recorded with main.py --record")
+    parser.add_argument('--render', action='store_true', help="draw the game while playing back")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="playback speed as a multiple of the recorded tick rate (with --render)")
+    parser.add_argument('--enemy-storage', choices=['objects', 'arrays'])
+    args = parser.parse_args(argv)
+
+    replay = Replay(args.replay)
+    if not args.render:
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import pygame
+    pygame.init()
+    world = create_world(replay, args.enemy_storage)
+
+    start = time.perf_counter()
+    if args.render:
+        play_rendered(replay, world, args.speed)
+    else:
+        play(replay, world)
+    elapsed = time.perf_counter() - start
+
+    summary = world.state_summary()
+    summary['inputs'] = len(replay.inputs)
+    summary['ticks_per_second'] = world.tick / elapsed if elapsed else 0.0
+    print(json.dumps(summary, indent=4))
+    pygame.quit()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
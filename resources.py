@@ -1,11 +1,137 @@
 import pygame
 import os
-from config import GameConfig
+import threading
+import time
+from collections import OrderedDict
+from config import get_config
+
+class SpriteCache:
+    """Process-wide cache of circle sprites and their collision masks.
+
+    Entries are keyed by (kind, size, color) and shared by reference, so
+    entities must never draw onto a cached surface. The warm-up, main and
+    simulation threads all use it, so lookups and counters take a lock and
+    each sprite is built once.
+    """
+    def __init__(self):
+        self.sprites = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.world_size = None
+
+    def get(self, kind, size, color):
+        key = (kind, size, color)
+        with self.lock:
+            sprite = self.sprites.get(key)
+            if sprite is not None:
+                self.hits += 1
+                return sprite
+            self.misses += 1
+            surface = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+            pygame.draw.circle(surface, color, (size, size), size)
+            sprite = (surface, pygame.mask.from_surface(surface))
+            self.sprites[key] = sprite
+            return sprite
+
+    def on_config_changed(self, snapshot):
+        # Enemy size follows world_height, so old entries are dead weight
+        world_size = (snapshot.world_width, snapshot.world_height)
+        if world_size != self.world_size:
+            self.world_size = world_size
+            self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.sprites.clear()
+
+    def stats(self):
+        """Return hit/miss counters and the memory held by cached surfaces."""
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self.sprites),
+                'surface_bytes': sum(surface_bytes(surface) for surface, _ in self.sprites.values())
+            }
+
+class TextCache:
+    """Process-wide LRU cache of rendered text surfaces.
+
+    Keyed by (size, text, color, antialias) and capped by the pixel memory
+    of the cached surfaces; the least recently used entries are evicted
+    first. `renders` counts surfaces actually rendered, so a steady-state
+    frame should leave it unchanged.
+    """
+    def __init__(self, max_bytes):
+        self.entries = OrderedDict()
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.renders = 0
+        self.evictions = 0
+
+    def get(self, font, size, text, color, antialias):
+        key = (size, text, color, antialias)
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.renders += 1
+        surface = font.render(text, antialias, color)
+        self.entries[key] = surface
+        self.bytes += surface_bytes(surface)
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= surface_bytes(evicted)
+            self.evictions += 1
+        return surface
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'renders': self.renders,
+            'evictions': self.evictions,
+            'entries': len(self.entries),
+            'surface_bytes': self.bytes
+        }
+
+def surface_bytes(surface):
+    return surface.get_bytesize() * surface.get_width() * surface.get_height()
+
+# Fonts are shared by every ResourceManager; pygame.font.Font is expensive to build.
+# FreeType isn't thread-safe, so fonts are only built and used on the main thread.
+fonts = {}
+
+# Font sizes used by the UI, the HUD and the profiler overlay
+UI_FONT_SIZES = (36, 32, 24, 18)
+
+class SurfaceStats:
+    """Counts surfaces made through ResourceManager.create_surface(): layers, backgrounds, panels."""
+    def __init__(self):
+        self.created = 0
+
+surface_stats = SurfaceStats()
+
+sprite_cache = SpriteCache()
+_config = get_config()
+sprite_cache.world_size = (_config.world_width, _config.world_height)
+_config.subscribe(sprite_cache.on_config_changed)
+text_cache = TextCache(_config.text_cache_kib * 1024)
 
 class ResourceManager:
     def __init__(self):
-        self.config = GameConfig()
-        self.fonts = {}
+        self.config = get_config()
+        self.sprites = sprite_cache
+        self.text = text_cache
+        self.surfaces = surface_stats
+        self.fonts = fonts
         self.colors = {
             'WHITE': (255, 255, 255),
             'BLACK': (0, 0, 0),
@@ -32,10 +158,49 @@ class ResourceManager:
         size = int(base_size * scale_factor)
         return self.get_font(size)
 
+    def render_text(self, size, text, color, antialias=True):
+        """Render text with the font of the given size, reusing a cached surface when possible."""
+        return self.text.get(self.get_font(size), size, text, color, antialias)
+
+    def create_surface(self, size, flags=0):
+        """Create a surface outside the caches, counted for the profiler."""
+        self.surfaces.created += 1
+        return pygame.Surface(size, flags)
+
     def get_color(self, name):
         """Get a color by name."""
         return self.colors.get(name, self.colors['WHITE'])
 
+    def get_sprite(self, kind, size, color):
+        """Get a shared (surface, mask) pair for a filled circle of the given radius."""
+        return self.sprites.get(kind, size, color)
+
+    def warm_up_fonts(self):
+        """Load the UI fonts; main thread only."""
+        for size in UI_FONT_SIZES:
+            self.get_font(size)
+
+    def warm_up_sprites(self):
+        """Build the enemy and projectile sprites; return seconds taken."""
+        start = time.perf_counter()
+        self.get_sprite('enemy', self.get_enemy_size(self.config.world_height), self.get_color('RED'))
+        self.get_sprite('projectile', 5, self.get_color('YELLOW_GREEN'))
+        return time.perf_counter() - start
+
+    def warm_up_in_background(self, on_done=None):
+        """Run warm_up_sprites() on a daemon thread, then on_done(seconds) if given.
+
+        Sprites land in the shared cache. A lookup from another thread waits
+        for a sprite that is being built instead of building its own copy.
+        """
+        def run():
+            seconds = self.warm_up_sprites()
+            if on_done is not None:
+                on_done(seconds)
+        thread = threading.Thread(target=run, name='resource-warm-up', daemon=True)
+        thread.start()
+        return thread
+
     def create_button(self, x, y, width, height, text, color_name='BLUE'):
         """Create a button with the specified properties."""
         from ui import Button
@@ -63,6 +228,10 @@ class ResourceManager:
         shop_y = screen_height - shop_height  # Position at bottom
         return shop_y, shop_height
 
+    def get_enemy_size(self, screen_height):
+        """Get the enemy sprite radius based on screen height."""
+        return int(screen_height * 0.02)
+
     def get_tower_size(self, screen_width, screen_height):
         """Get the tower size based on screen size."""
         return int(min(screen_width, screen_height) * 0.05)
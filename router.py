@@ -0,0 +1,146 @@
+import pygame
+
+class HitGrid:
+    """Uniform grid of screen cells, each listing the widgets that overlap it.
+
+    A lookup only tests the few widgets in the cell under the point, so
+    its cost doesn't grow with the number of widgets on screen. Widgets
+    added later are on top and win where they overlap.
+    """
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def insert(self, widget):
+        rect = widget.hit_rect()
+        size = self.cell_size
+        for cx in range(rect.left // size, (rect.right - 1) // size + 1):
+            for cy in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                self.cells.setdefault((cx, cy), []).append((rect, widget))
+
+    def hit(self, pos):
+        """Return the topmost widget at pos, or None."""
+        size = self.cell_size
+        for rect, widget in reversed(self.cells.get((pos[0] // size, pos[1] // size), ())):
+            if rect.collidepoint(pos):
+                return widget
+        return None
+
+    def clear(self):
+        self.cells.clear()
+
+class StateRoutes:
+    """The widgets and fallback handlers of one game state."""
+    def __init__(self, cell_size):
+        self.grid = HitGrid(cell_size)
+        self.actions = {}  # widget -> callback run when it's clicked
+        self.handlers = {}  # event type -> handler for events no widget took
+
+class EventRouter:
+    """Sends each event to the widgets of the current state.
+
+    Mouse events are dispatched by type: the widget under the pointer is
+    found through the state's HitGrid, so only that widget sees the
+    event. Hover state is only touched when the hovered widget changes,
+    and a widget that starts a drag (a Slider) gets the following motion
+    and button-up events until it's released. Events no widget took go to
+    the handler registered for their type with on().
+    """
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.states = {}
+        self.state = None
+        self.hovered = None
+        self.captured = None
+        self.routes = {
+            pygame.MOUSEMOTION: self.route_motion,
+            pygame.MOUSEBUTTONDOWN: self.route_button_down,
+            pygame.MOUSEBUTTONUP: self.route_button_up,
+        }
+
+    def state_routes(self, state):
+        routes = self.states.get(state)
+        if routes is None:
+            routes = self.states[state] = StateRoutes(self.cell_size)
+        return routes
+
+    def add(self, state, widget, on_click=None):
+        """Route events in state to widget; on_click() runs when it's clicked."""
+        routes = self.state_routes(state)
+        routes.grid.insert(widget)
+        if on_click is not None:
+            routes.actions[widget] = on_click
+
+    def on(self, state, handler, *event_types):
+        """Send events of event_types in state that no widget took to handler(event)."""
+        handlers = self.state_routes(state).handlers
+        for event_type in event_types:
+            handlers[event_type] = handler
+
+    def clear(self, state):
+        """Forget the widgets of state, e.g. before the UI is rebuilt."""
+        routes = self.state_routes(state)
+        routes.grid.clear()
+        routes.actions.clear()
+        if self.state == state:
+            self.hover(None)
+            self.captured = None
+
+    def event_types(self):
+        """Every event type the router or a registered handler uses."""
+        types = set(self.routes)
+        for routes in self.states.values():
+            types.update(routes.handlers)
+        return types
+
+    def route(self, state, event):
+        if state != self.state:
+            self.hover(None)
+            self.captured = None
+            self.state = state
+        routes = self.states.get(state)
+        if routes is None:
+            return
+        route = self.routes.get(event.type)
+        if route is not None and route(routes, event):
+            return
+        handler = routes.handlers.get(event.type)
+        if handler is not None:
+            handler(event)
+
+    def hover(self, widget):
+        if widget is self.hovered:
+            return
+        if self.hovered is not None:
+            self.hovered.set_hovered(False)
+        if widget is not None:
+            widget.set_hovered(True)
+        self.hovered = widget
+
+    def route_motion(self, routes, event):
+        if self.captured is not None:
+            return self.captured.handle_event(event)
+        self.hover(routes.grid.hit(event.pos))
+        return False
+
+    def route_button_down(self, routes, event):
+        widget = routes.grid.hit(event.pos)
+        self.hover(widget)
+        if widget is None or not widget.handle_event(event):
+            return False
+        if getattr(widget, 'is_dragging', False):
+            self.captured = widget
+        action = routes.actions.get(widget)
+        if action is not None:
+            action()
+        return True
+
+    def route_button_up(self, routes, event):
+        widget = self.captured
+        if widget is None:
+            return False
+        self.captured = None
+        widget.handle_event(event)
+        self.hovered = None
+        widget.set_hovered(False)
+        return True
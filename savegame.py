@@ -0,0 +1,243 @@
+"""Binary save games for GameWorld.
+
+A save is a fixed header followed by one packed column per field, e.g.
+every enemy's position, then every enemy's speed. Loading memory-maps the
+file and reads each column through a typed memoryview (or straight into
+the NumPy arrays of an EnemyStore), so large late-game states restore
+without parsing.
+"""
+import array
+import math
+import mmap
+import struct
+
+MAGIC = b'TDSV'
+VERSION = 4
+# magic, version, array enemies, rng version, window width, window height, tick rate,
+# tick, clock ticks, health, balance, last spawn time,
+# tower, enemy, projectile and pending hit counts, rng gauss_next (NaN for None)
+HEADER = struct.Struct('<4sHBBiiHqqdqdIIIId')
+RNG_STATE_LENGTH = 625
+
+TOWER_COLUMNS = (('x', 'i'), ('y', 'i'), ('last_shot_time', 'q'), ('selected', 'B'))
+ENEMY_COLUMNS = (('position', 'd'), ('speed', 'd'), ('health', 'i'))
+# target is the enemy's row in the enemy columns, or -1
+PROJECTILE_COLUMNS = (('tower', 'I'), ('target', 'i'), ('x', 'd'), ('y', 'd'), ('target_x', 'd'), ('target_y', 'd'),
+                      ('dx', 'd'), ('dy', 'd'), ('speed', 'd'), ('ticks_left', 'i'))
+# Analytic hits in flight; ticks_left is -1 for projectiles that collide
+HIT_COLUMNS = (('tower', 'I'), ('target', 'i'), ('due', 'q'))
+
+def padding(size):
+    return -size % 8
+
+def write_column(f, typecode, values):
+    data = array.array(typecode, values).tobytes()
+    f.write(data)
+    f.write(b'\0' * padding(len(data)))
+
+def save(world, path):
+    """Write the complete simulation state of world to path."""
+    towers = world.towers
+    if world.array_enemies:
+        store = world.moving_objects
+        slots = store.alive_slots()
+        enemy_columns = {'position': store.position[slots].tolist(),
+                         'speed': store.speed[slots].tolist(),
+                         'health': store.health[slots].tolist()}
+        enemy_count = len(slots)
+        rows = {handle: row for row, handle in enumerate(store.ids[slots].tolist())}
+    else:
+        enemies = list(world.moving_objects)
+        enemy_columns = {name: [getattr(enemy, name) for enemy in enemies] for name, _ in ENEMY_COLUMNS}
+        enemy_count = len(enemies)
+        rows = {enemy.handle: row for row, enemy in enumerate(enemies)}
+    projectiles = [(index, projectile) for index, tower in enumerate(towers)
+                   for projectile in tower.projectiles]
+    hits = [(index, hit) for index, tower in enumerate(towers) for hit in tower.pending_hits]
+
+    rng_version, rng_state, gauss_next = world.rng.getstate()
+    width, height = world.layout.size
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, world.array_enemies, rng_version, width, height, world.tick_rate,
+                            world.tick, world.clock.ticks, world.health, world.balance,
+                            world.last_spawn_time, len(towers), enemy_count, len(projectiles),
+                            len(hits), math.nan if gauss_next is None else gauss_next))
+        f.write(b'\0' * padding(HEADER.size))
+        write_column(f, 'I', rng_state)
+        write_column(f, 'i', [tower.rect.centerx for tower in towers])
+        write_column(f, 'i', [tower.rect.centery for tower in towers])
+        write_column(f, 'q', [tower.last_shot_time for tower in towers])
+        write_column(f, 'B', [tower.selected for tower in towers])
+        for name, typecode in ENEMY_COLUMNS:
+            write_column(f, typecode, enemy_columns[name])
+        write_column(f, 'I', [index for index, _ in projectiles])
+        write_column(f, 'i', [rows.get(projectile.target, -1) for _, projectile in projectiles])
+        for name, typecode in PROJECTILE_COLUMNS[2:-1]:
+            write_column(f, typecode, [getattr(projectile, name) for _, projectile in projectiles])
+        write_column(f, 'i', [-1 if projectile.ticks_left is None else projectile.ticks_left
+                              for _, projectile in projectiles])
+        write_column(f, 'I', [index for index, _ in hits])
+        write_column(f, 'i', [rows.get(handle, -1) for _, (_, handle) in hits])
+        write_column(f, 'q', [due for _, (due, _) in hits])
+
+def columns_size(columns, count):
+    """Bytes taken by count rows of columns, padding included."""
+    total = 0
+    for _, typecode in columns:
+        size = count * struct.calcsize(typecode)
+        total += size + padding(size)
+    return total
+
+def read_columns(view, offset, columns, count, views):
+    """Return ({name: typed memoryview}, next offset) for count rows of columns.
+
+    Each memoryview is also appended to views, for the caller to release.
+    """
+    result = {}
+    for name, typecode in columns:
+        size = count * struct.calcsize(typecode)
+        with view[offset:offset + size] as column:
+            result[name] = column.cast(typecode)
+        views.append(result[name])
+        offset += size + padding(size)
+    return result, offset
+
+def check_indexes(path, values, count, allow_none=False):
+    lowest = -1 if allow_none else 0
+    if values and (min(values) < lowest or max(values) >= count):
+        raise ValueError(f"{path} is corrupt: row index out of range")
+
+def load(world, path):
+    """Replace the state of world with the save at path and return world.
+
+    The world must use the same enemy storage, window size and tick rate as the save.
+    Entities currently in the world go back to its pools.
+    """
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        with memoryview(mapped) as view:
+            columns = []
+            try:
+                restore(world, view, path, columns)
+            finally:
+                # Column views pin the mapping, so they go before it closes, also when restore fails
+                for column in columns:
+                    column.release()
+    return world
+
+def restore(world, view, path, views):
+    if len(view) < HEADER.size:
+        raise ValueError(f"{path} is too short to be a save file")
+    (magic, version, array_enemies, rng_version, width, height, tick_rate, tick, clock_ticks, health, balance,
+     last_spawn_time, tower_count, enemy_count, projectile_count, hit_count,
+     gauss_next) = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a save file")
+    if version != VERSION:
+        raise ValueError(f"{path} has save version {version}, expected {VERSION}")
+    if bool(array_enemies) != world.array_enemies:
+        raise ValueError(f"{path} was saved with different enemy storage")
+    if (width, height) != world.layout.size:
+        raise ValueError(f"{path} was saved at {width}x{height}, the window is "
+                         f"{world.layout.size[0]}x{world.layout.size[1]}")
+    if tick_rate != world.tick_rate:
+        raise ValueError(f"{path} was saved at {tick_rate} ticks per second, the world runs at "
+                         f"{world.tick_rate}")
+
+
+    # Check the whole file against the header before the world is touched
+    offset = HEADER.size + padding(HEADER.size)
+    expected = (offset + columns_size((('state', 'I'),), RNG_STATE_LENGTH)
+                + columns_size(TOWER_COLUMNS, tower_count) + columns_size(ENEMY_COLUMNS, enemy_count)
+                + columns_size(PROJECTILE_COLUMNS, projectile_count) + columns_size(HIT_COLUMNS, hit_count))
+    if len(view) != expected:
+        raise ValueError(f"{path} is truncated or corrupt: {len(view)} bytes, the header needs {expected}")
+    rng, offset = read_columns(view, offset, (('state', 'I'),), RNG_STATE_LENGTH, views)
+    towers, offset = read_columns(view, offset, TOWER_COLUMNS, tower_count, views)
+    enemy_offset = offset
+    enemies, offset = read_columns(view, offset, ENEMY_COLUMNS, enemy_count, views)
+    projectiles, offset = read_columns(view, offset, PROJECTILE_COLUMNS, projectile_count, views)
+    hits, offset = read_columns(view, offset, HIT_COLUMNS, hit_count, views)
+    check_indexes(path, projectiles['tower'], tower_count)
+    check_indexes(path, projectiles['target'], enemy_count, allow_none=True)
+    check_indexes(path, hits['tower'], tower_count)
+    check_indexes(path, hits['target'], enemy_count, allow_none=True)
+
+    # First, as setstate() rejects a bad state with ValueError
+    world.rng.setstate((rng_version, tuple(rng['state']), None if math.isnan(gauss_next) else gauss_next))
+    world.tick = tick
+    world.clock.ticks = clock_ticks
+    world.health = int(health) if health.is_integer() else health  # benchmarks use inf
+    world.balance = balance
+    world.last_spawn_time = last_spawn_time
+    world.selected_tower = None
+    world.is_dragging = False
+    world.scheduler.clear()
+    world.schedule_spawns()
+
+    # Hand the current entities back to the pools
+    pools = world.pools
+    for tower in world.towers:
+        for projectile in tower.projectiles:
+            pools.release(projectile)
+    if world.array_enemies:
+        handles = restore_store(world.moving_objects, view, enemy_offset, enemy_count)
+    else:
+        registry = world.moving_objects
+        for enemy in registry:
+            pools.release(enemy)
+        registry.clear()
+        handles = []
+        for position, speed, health in zip(enemies['position'], enemies['speed'], enemies['health']):
+            enemy = pools.enemies.acquire()
+            enemy.reset(speed)
+            enemy.position = position
+            enemy.rect.centerx = int(position)
+            enemy.health = health
+            handles.append(registry.add(enemy))
+
+    world.towers = []
+    world.active_towers.clear()
+    for x, y, last_shot_time, selected in zip(towers['x'], towers['y'],
+                                              towers['last_shot_time'], towers['selected']):
+        tower = world.create_tower((x, y))
+        tower.last_shot_time = last_shot_time
+        tower.schedule_ready()
+        tower.selected = bool(selected)
+        world.add_tower(tower)
+
+    for i in range(projectile_count):
+        projectile = pools.projectiles.acquire()
+        projectile.reset(projectiles['x'][i], projectiles['y'][i], projectiles['target_x'][i],
+                         projectiles['target_y'][i], projectiles['speed'][i])
+        # Keep the exact in-flight direction rather than re-aiming from here
+        projectile.dx = projectiles['dx'][i]
+        projectile.dy = projectiles['dy'][i]
+        target = projectiles['target'][i]
+        projectile.target = handles[target] if target >= 0 else None
+        ticks_left = projectiles['ticks_left'][i]
+        projectile.ticks_left = ticks_left if ticks_left >= 0 else None
+        tower = world.towers[projectiles['tower'][i]]
+        tower.projectiles.append(projectile)
+        tower.wake()
+
+    for tower, target, due in zip(hits['tower'], hits['target'], hits['due']):
+        if target >= 0:  # hits on enemies that are gone can't land
+            world.towers[tower].schedule_hit(due, handles[target], world.moving_objects)
+    world.loads += 1
+
+def restore_store(store, view, offset, count):
+    import numpy as np
+
+    if count > len(store.position):
+        store.grow(count)
+    buffer = view.obj
+    for name, typecode in ENEMY_COLUMNS:
+        dtype = np.dtype(typecode)
+        getattr(store, name)[:count] = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+        size = count * dtype.itemsize
+        offset += size + padding(size)
+    store.alive[:count] = True
+    store.ids[:count] = np.arange(store.next_id, store.next_id + count)
+    store.next_id += count
+    store.count = count
+    return store.ids[:count].tolist()
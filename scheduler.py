@@ -0,0 +1,71 @@
+import heapq
+import itertools
+
+class Timer:
+    """Handle for a scheduled callback; pass it to Scheduler.cancel()."""
+    __slots__ = ('time', 'interval', 'callback', 'args', 'cancelled')
+
+    def __init__(self, time, interval, callback, args):
+        self.time = time
+        self.interval = interval
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+class Scheduler:
+    """Priority heap of timed callbacks driven by a clock's get_ticks().
+
+    run_due() pops and calls everything due, so the per-tick cost is one
+    comparison when nothing is. Repeating timers are rescheduled relative
+    to when they actually ran, which on a fixed tick matches a "has the
+    interval elapsed since last time" check made every tick. Cancelled
+    timers are dropped lazily when they reach the top of the heap.
+    """
+    def __init__(self, clock):
+        self.clock = clock
+        self.queue = []
+        self.sequence = itertools.count()  # keeps same-time timers in FIFO order
+
+    def at(self, time, callback, *args):
+        """Call callback(*args) once the clock reaches time."""
+        return self.push(Timer(time, None, callback, args))
+
+    def after(self, delay, callback, *args):
+        """Call callback(*args) delay milliseconds from now."""
+        return self.at(self.clock.get_ticks() + delay, callback, *args)
+
+    def every(self, interval, callback, *args, start=None):
+        """Call callback(*args) every interval milliseconds, first at start (default: now + interval)."""
+        if start is None:
+            start = self.clock.get_ticks() + interval
+        return self.push(Timer(start, interval, callback, args))
+
+    def push(self, timer):
+        heapq.heappush(self.queue, (timer.time, next(self.sequence), timer))
+        return timer
+
+    def cancel(self, timer):
+        if timer is not None:
+            timer.cancelled = True
+
+    def run_due(self, now=None):
+        """Run every timer due at or before now (default: the clock's time)."""
+        if now is None:
+            now = self.clock.get_ticks()
+        queue = self.queue
+        while queue and queue[0][0] <= now:
+            timer = heapq.heappop(queue)[2]
+            if timer.cancelled:
+                continue
+            if timer.interval is not None:
+                timer.time = now + timer.interval
+                self.push(timer)
+            timer.callback(*timer.args)
+
+    def clear(self):
+        for _, _, timer in self.queue:
+            timer.cancelled = True
+        self.queue.clear()
+
+    def __len__(self):
+        return sum(1 for _, _, timer in self.queue if not timer.cancelled)
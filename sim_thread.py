@@ -0,0 +1,234 @@
+"""Run a GameWorld on its own thread and draw it from render snapshots.
+
+Opt in with the performance.simulation_thread setting. The worker steps
+the world at its tick rate and, after each batch of ticks, publishes a
+RenderSnapshot: an immutable copy of what drawing needs. The main thread
+draws the latest snapshot while the worker builds the next one, so
+update and draw overlap on machines with more than one core (blits and
+display flips run without the GIL).
+"""
+import collections
+import threading
+import time
+from clock import FixedStep
+from entities import draw_health_bar, draw_tower
+from profiler import FrameProfiler
+from world import StaticLayers, create_health_bar
+
+class RenderSnapshot:
+    """What drawing a world needs, copied from it between ticks.
+
+    enemies holds (position, speed, health, max_health) and towers holds
+    (rect, color, selected, range, projectiles), with each projectile as
+    (x, y, dx, dy). time is the perf_counter() time at which tick was due,
+    for interpolation. layout is the world's WorldLayout, which is replaced
+    rather than changed, and loads its count of restored saves. error is the
+    exception that stopped the worker.
+    """
+    __slots__ = ('tick', 'time', 'game_over', 'error', 'layout', 'loads', 'health', 'balance', 'enemies',
+                 'towers', 'preview')
+
+    def __init__(self, world, time, game_over=False):
+        self.tick = world.tick
+        self.time = time
+        self.game_over = game_over
+        self.error = None
+        self.layout = world.layout
+        self.loads = world.loads
+        self.health = world.health
+        self.balance = world.balance
+        if world.array_enemies:
+            store = world.moving_objects
+            slots = store.alive_slots()
+            self.enemies = tuple((position, speed, health, store.max_health) for position, speed, health in
+                                 zip(store.position[slots].tolist(), store.speed[slots].tolist(),
+                                     store.health[slots].tolist()))
+        else:
+            self.enemies = tuple((enemy.position, enemy.speed, enemy.health, enemy.max_health)
+                                 for enemy in world.moving_objects)
+        self.towers = tuple((tower.rect.copy(), tower.color, tower.selected, tower.range,
+                             tuple((projectile.x, projectile.y, projectile.dx, projectile.dy)
+                                   for projectile in tower.projectiles))
+                            for tower in world.towers)
+        tower = world.selected_tower
+        self.preview = (tower.rect.copy(), tower.color, tower.selected, tower.range) if tower else None
+
+    def __setattr__(self, name, value):
+        if hasattr(self, name):
+            raise AttributeError("RenderSnapshot is read-only")
+        object.__setattr__(self, name, value)
+
+    def failed(self, error):
+        """Return a copy of this snapshot marked with the error that stopped the worker."""
+        snapshot = object.__new__(RenderSnapshot)
+        for name in self.__slots__:
+            object.__setattr__(snapshot, name, error if name == 'error' else getattr(self, name))
+        return snapshot
+
+class SimulationWorker:
+    """Steps a GameWorld on a background thread at its tick rate.
+
+    While it runs, the world belongs to the worker thread. The main thread
+    reads latest, the most recently published RenderSnapshot, and changes
+    the world only through submit(), which queues a call for the worker to
+    make between ticks. The queue is a deque, whose append and popleft are
+    atomic, so neither side ever waits on a lock. Config changes reach the
+    world the same way.
+    """
+    def __init__(self, world, max_steps=5):
+        self.world = world
+        self.stepper = FixedStep(1 / world.tick_rate, max_steps)
+        self.inbox = collections.deque()
+        self.wake = threading.Event()
+        self.running = False
+        self.thread = None
+        self.latest = RenderSnapshot(world, time.perf_counter())
+
+    def start(self):
+        config = self.world.config
+        config.unsubscribe(self.world.on_config_changed)
+        config.subscribe(self.on_config_changed)
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='simulation', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the thread and hand the world back to the caller."""
+        if self.thread is None:
+            return
+        self.running = False
+        self.wake.set()
+        self.thread.join()
+        self.thread = None
+        self.drain()  # calls submitted after the last tick
+        config = self.world.config
+        config.unsubscribe(self.on_config_changed)
+        config.subscribe(self.world.on_config_changed)
+        self.world.reset_view()  # settings may have changed while the view was the SnapshotView's
+
+    def submit(self, func, *args):
+        """Have the worker call func(*args) before its next tick."""
+        self.inbox.append((func, args))
+        self.wake.set()
+
+    def on_config_changed(self, snapshot):
+        # Only the simulation side; the main thread's SnapshotView keeps its own layers and HUD
+        self.submit(self.world.apply_config, snapshot)
+
+    def drain(self):
+        inbox = self.inbox
+        calls = 0
+        while inbox:
+            func, args = inbox.popleft()
+            func(*args)
+            calls += 1
+        return calls
+
+    def run(self):
+        try:
+            self.step_world()
+        except Exception as error:
+            # Publish the failure so the main thread stops drawing the last frame
+            self.latest = self.latest.failed(error)
+
+    def step_world(self):
+        world = self.world
+        stepper = self.stepper
+        previous = time.perf_counter()
+        game_over = False
+        while self.running and not game_over:
+            changed = self.drain()
+            now = time.perf_counter()
+            steps = stepper.advance(now - previous)
+            previous = now
+            for _ in range(steps):
+                with world.profiler.span('world update', tick=world.tick):
+                    game_over = world.update()
+                if game_over:
+                    break
+            if steps or changed:
+                # Build the next snapshot off to the side, then swap it in with one assignment
+                self.latest = RenderSnapshot(world, now - stepper.accumulator, game_over)
+            # Sleep until the next tick is due or input arrives
+            self.wake.wait(max(0.0, stepper.step_seconds - stepper.accumulator))
+            self.wake.clear()
+
+class SnapshotView:
+    """Draws RenderSnapshots of a world on the main thread.
+
+    The view keeps its own static layers and health bar, built for the
+    snapshot's layout, so nothing it draws with is touched by the worker.
+    """
+    def __init__(self, world, profiler=None):
+        self.world = world
+        self.resources = world.resources
+        self.config = world.config
+        self.profiler = profiler or FrameProfiler()  # the main thread's, for layer spans
+        self.layers = None
+        self.health_bar = None
+
+    def static_layers(self, snapshot):
+        layers = self.layers
+        if layers is None or layers.layout is not snapshot.layout or \
+                layers.tower_cost != self.config.tower_cost:
+            layers = self.layers = StaticLayers(self.resources, snapshot.layout, self.config.tower_cost)
+            self.health_bar = create_health_bar(self.resources, snapshot.layout)
+        return layers
+
+    def draw(self, surface, snapshot, lag=0.0):
+        profiler = self.profiler
+        layers = self.static_layers(snapshot)
+        with profiler.span('road'):
+            layers.draw_road(surface)
+        with profiler.span('entities'):
+            self.draw_entities(surface, snapshot, lag)
+        with profiler.span('shop'):
+            layers.draw_shop(surface)
+        with profiler.span('hud'):
+            self.draw_hud(surface, snapshot)
+
+    def draw_static(self, surface, snapshot):
+        layers = self.static_layers(snapshot)
+        layers.draw_road(surface)
+        layers.draw_shop(surface)
+
+    def draw_dynamic(self, surface, background, snapshot, lag=0.0):
+        """Like GameWorld.draw_dynamic, for a snapshot."""
+        profiler = self.profiler
+        with profiler.span('entities'):
+            rects = self.draw_entities(surface, snapshot, lag)
+        with profiler.span('shop'):
+            self.static_layers(snapshot).restore_shop(surface, background, rects)
+        with profiler.span('hud'):
+            return rects + self.draw_hud(surface, snapshot)
+
+    def draw_hud(self, surface, snapshot):
+        self.static_layers(snapshot)
+        self.health_bar.set_health(snapshot.health)
+        return [self.world.draw_balance(surface, snapshot.balance), self.health_bar.draw(surface)]
+
+    def draw_entities(self, surface, snapshot, lag):
+        """Draw enemies and projectiles lag ticks back along their paths, and the towers."""
+        resources = self.resources
+        height = snapshot.layout.size[1]
+        lane_y = height // 2
+        rects = []
+
+        enemy, _ = resources.get_sprite('enemy', resources.get_enemy_size(height), resources.get_color('RED'))
+        for position, speed, health, max_health in snapshot.enemies:
+            rect = enemy.get_rect(center=(int(position - speed * lag), lane_y))
+            drawn = surface.blit(enemy, rect)
+            if health < max_health:
+                drawn.union_ip(draw_health_bar(surface, resources, rect, health, max_health))
+            rects.append(drawn)
+
+        projectile, _ = resources.get_sprite('projectile', 5, resources.get_color('YELLOW_GREEN'))
+        for rect, color, selected, tower_range, projectiles in snapshot.towers:
+            rects.append(draw_tower(surface, resources, rect, color, selected, tower_range))
+            for x, y, dx, dy in projectiles:
+                center = (int(x - dx * lag), int(y - dy * lag))
+                rects.append(surface.blit(projectile, projectile.get_rect(center=center)))
+
+        if snapshot.preview is not None:
+            rects.append(draw_tower(surface, resources, *snapshot.preview))
+        return rects
@@ -0,0 +1,21 @@
+import os
+import random
+
+def init_headless():
+    """Bring up pygame on the SDL dummy video driver, with no window."""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import pygame
+    pygame.init()
+
+def create_world(seed=None, enemy_storage=None):
+    """Build a GameWorld driven by its own tick clock and a seeded RNG."""
+    from world import GameWorld
+    return GameWorld(enemy_storage=enemy_storage, rng=random.Random(seed))
+
+def run_headless(ticks, seed=None, enemy_storage=None):
+    """Advance a fresh world for up to ticks updates, stopping early on game over."""
+    world = create_world(seed, enemy_storage)
+    for _ in range(ticks):
+        if world.update():
+            break
+    return world
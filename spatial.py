@@ -0,0 +1,150 @@
+import bisect
+import math
+
+class EnemyIndex:
+    """Enemies sorted by position along the road, rebuilt once per tick.
+
+    All enemies travel the same horizontal lane, so for a tower the nearest
+    enemy that hasn't passed it is the one with the largest position left of
+    the tower. Queries are a bisect plus a short walk instead of a full scan.
+    """
+    def __init__(self):
+        self.positions = []
+        self.enemies = []
+        self.order = []  # position in the source list, used to break ties
+        self.store = None
+
+    def rebuild(self, moving_objects):
+        self.store = None
+        entries = sorted(
+            ((obj.position, index, obj) for index, obj in enumerate(moving_objects)),
+            key=lambda entry: (entry[0], entry[1])
+        )
+        self.positions = [entry[0] for entry in entries]
+        self.order = [entry[1] for entry in entries]
+        self.enemies = [entry[2] for entry in entries]
+
+    def rebuild_from_store(self, store):
+        """Index an EnemyStore by slot number without materializing views."""
+        slots = store.alive_slots()
+        positions = store.position[slots]
+        order = positions.argsort(kind='stable')
+        self.store = store
+        self.positions = positions[order].tolist()
+        self.order = slots[order].tolist()  # slots keep spawn order, like the list
+        self.enemies = list(self.order)
+
+    def remove(self, obj):
+        """Drop an enemy that was killed during this tick."""
+        key = obj.slot if self.store is not None else obj
+        i = bisect.bisect_left(self.positions, obj.position)
+        while i < len(self.positions) and self.positions[i] == obj.position:
+            if self.enemies[i] is key or self.enemies[i] == key:
+                del self.positions[i]
+                del self.order[i]
+                del self.enemies[i]
+                return
+            i += 1
+
+    def nearest_before(self, x, dy, max_range):
+        """Return the nearest enemy with position < x within max_range, or None.
+
+        Matches Tower's linear scan exactly: distance is computed the same
+        way and ties go to the enemy that comes first in the source list.
+        """
+        i = bisect.bisect_left(self.positions, x) - 1
+        if i < 0:
+            return None
+
+        dx = self.positions[i] - x
+        best_distance = math.sqrt(dx * dx + dy * dy)
+        if best_distance > max_range:
+            return None
+
+        # Distance only grows to the left, so equal distances form a run here
+        best = i
+        i -= 1
+        while i >= 0:
+            dx = self.positions[i] - x
+            if math.sqrt(dx * dx + dy * dy) != best_distance:
+                break
+            if self.order[i] < self.order[best]:
+                best = i
+            i -= 1
+        if self.store is not None:
+            return self.store.view(self.enemies[best])
+        return self.enemies[best]
+
+    def __len__(self):
+        return len(self.enemies)
+
+class OccupancyGrid:
+    """Answers "can a tower go here?" and "which tower is here?" in O(1).
+
+    blocked holds one byte per world pixel, set where a tower's centre may
+    not go: the road band, the margins at the left and right edges, and
+    within tower_size of a placed tower's centre on both axes. Towers are
+    also bucketed by the tower_size cells their rects overlap, so picking
+    one only tests the few towers in the cell under the point.
+
+    Towers are never moved or removed once placed, so the grid follows the
+    world's towers list by adding whatever was appended since sync() last
+    ran; a new layout or a replaced list needs a new grid.
+    """
+    def __init__(self, layout, towers):
+        self.layout = layout
+        self.towers = towers
+        self.count = 0
+        self.width, self.height = layout.size
+        self.cell_size = size = layout.tower_size
+        self.cells = {}
+
+        # Every row blocks the edge margins, then the road band blocks whole rows
+        width, height = layout.size
+        margin = size // 2
+        row = bytearray(width)
+        row[:margin] = b'\x01' * min(margin, width)
+        row[width - margin + 1:] = b'\x01' * max(0, margin - 1)
+        self.blocked = bytearray(bytes(row) * height)
+        top = max(0, layout.road_y)
+        bottom = min(height, layout.road_y + layout.road_height + 1)
+        if top < bottom:
+            self.blocked[top * width:bottom * width] = b'\x01' * ((bottom - top) * width)
+        self.sync()
+
+    def block_row(self, y, start, end):
+        if start < end:
+            offset = y * self.width
+            self.blocked[offset + start:offset + end] = b'\x01' * (end - start)
+
+    def sync(self):
+        """Add the towers appended to the list since the last sync."""
+        towers = self.towers
+        while self.count < len(towers):
+            self.add(towers[self.count])
+            self.count += 1
+
+    def add(self, tower):
+        size = self.cell_size
+        x, y = tower.rect.center
+        for row in range(max(0, y - size + 1), min(self.height, y + size)):
+            self.block_row(row, max(0, x - size + 1), min(self.width, x + size))
+        rect = tower.rect
+        for cx in range(rect.left // size, (rect.right - 1) // size + 1):
+            for cy in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                self.cells.setdefault((cx, cy), []).append(tower)
+
+    def is_free(self, pos):
+        """True if a tower centred on pos would be off the road, inside the world and clear of towers."""
+        x, y = pos
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return False
+        return not self.blocked[y * self.width + x]
+
+    def tower_at(self, pos):
+        """The first placed tower whose rect contains pos, or None."""
+        size = self.cell_size
+        for tower in self.cells.get((pos[0] // size, pos[1] // size), ()):
+            if tower.rect.collidepoint(pos):
+                return tower
+        return None
@@ -0,0 +1,71 @@
+import json
+import os
+import threading
+from time import perf_counter
+
+class TraceRecorder:
+    """Streams timed spans to a file in the Chrome trace-event format.
+
+    Spans are kept as tuples and only formatted when flush_events have
+    piled up, so recording a span costs one append. The output loads in
+    chrome://tracing, Perfetto and speedscope. Call close() to finish the
+    file; the JSON array form is used because chrome://tracing also
+    accepts it unterminated, e.g. after a crash.
+
+    Any thread may record spans; each thread's spans appear on its own
+    track, named after the thread.
+    """
+    def __init__(self, path, flush_events=4096):
+        self.path = path
+        self.flush_events = flush_events
+        self.events = []
+        self.lock = threading.RLock()  # complete() flushes while holding it
+        self.origin = perf_counter()
+        self.pid = os.getpid()
+        self.tid = threading.get_ident()
+        self.threads = set()  # tids whose thread_name is written
+        self.file = open(path, 'w', buffering=1 << 20)
+        self.file.write('[\n')
+        self.file.write(json.dumps({'name': 'process_name', 'ph': 'M', 'pid': self.pid,
+                                    'tid': self.tid, 'args': {'name': 'Tower Defense Game'}}))
+
+    def complete(self, name, start, duration, args=None):
+        """Record a finished span; start and duration are perf_counter() seconds."""
+        with self.lock:
+            self.events.append((name, start, duration, args, threading.get_ident()))
+            if len(self.events) >= self.flush_events:
+                self.flush()
+
+    def flush(self):
+        with self.lock:
+            if not self.events or self.file.closed:
+                return
+            start = perf_counter()
+            origin, pid = self.origin, self.pid
+            lines = []
+            for name, begin, duration, args, tid in self.events:
+                if tid not in self.threads:
+                    self.threads.add(tid)
+                    lines.append(self.thread_name(tid))
+                line = (f',\n{{"name": {json.dumps(name)}, "ph": "X", "pid": {pid}, "tid": {tid}, '
+                        f'"ts": {(begin - origin) * 1e6:.3f}, "dur": {duration * 1e6:.3f}')
+                if args:
+                    line += f', "args": {json.dumps(args)}'
+                lines.append(line + '}')
+            self.events = [('trace flush', start, perf_counter() - start, {'events': len(lines)},
+                            threading.get_ident())]
+            self.file.write(''.join(lines))
+
+    def thread_name(self, tid):
+        name = next((thread.name for thread in threading.enumerate() if thread.ident == tid), str(tid))
+        return ',\n' + json.dumps({'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid,
+                                    'args': {'name': name}})
+
+    def close(self):
+        with self.lock:
+            if self.file.closed:
+                return
+            self.flush()
+            self.events = []  # drop the span of the final flush
+            self.file.write('\n]\n')
+            self.file.close()
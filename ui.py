@@ -1,22 +1,34 @@
 import pygame
 from abc import ABC, abstractmethod
-from config import GameConfig
-from resources import ResourceManager
+from config import get_config
 
 class UIElement(ABC):
     def __init__(self, x, y, width, height):
         self.rect = pygame.Rect(x, y, width, height)
-        self.config = GameConfig()
-        self.resources = ResourceManager()
+        self.config = get_config()
         self.is_hovered = False
+        self.dirty = True  # needs redrawing; cleared by draw()
+        self.parent = None  # container redrawn along with this element
 
     @abstractmethod
     def draw(self, surface):
+        """Draw the element and return the Rect it covered."""
         pass
 
+    def hit_rect(self):
+        """Area that receives mouse events when routed by an EventRouter."""
+        return self.rect
+
+    def set_hovered(self, is_hovered):
+        if is_hovered != self.is_hovered:
+            self.is_hovered = is_hovered
+            self.dirty = True
+            if self.parent is not None:
+                self.parent.dirty = True
+
     def handle_event(self, event):
         if event.type == pygame.MOUSEMOTION:
-            self.is_hovered = self.rect.collidepoint(event.pos)
+            self.set_hovered(bool(self.rect.collidepoint(event.pos)))
             return False
         return False
 
@@ -26,7 +38,8 @@ class Button(UIElement):
         self.text = text
         self.color = color
         self.resource_manager = resource_manager
-        self.font = resource_manager.get_scaled_font(36)
+        self.font_size = 36
+        self.font = resource_manager.get_scaled_font(self.font_size)
         self.ensure_min_width()
 
     def ensure_min_width(self):
@@ -39,9 +52,12 @@ class Button(UIElement):
         pygame.draw.rect(surface, color, self.rect)
         pygame.draw.rect(surface, self.resource_manager.get_color('BLACK'), self.rect, 2)
         
-        text_surface = self.font.render(self.text, True, self.resource_manager.get_color('BLACK'))
+        text_surface = self.resource_manager.render_text(self.font_size, self.text, self.resource_manager.get_color('BLACK'))
         text_rect = text_surface.get_rect(center=self.rect.center)
         surface.blit(text_surface, text_rect)
+        
+        self.dirty = False
+        return self.rect.union(text_rect)
 
     def handle_event(self, event):
         if super().handle_event(event):
@@ -58,7 +74,7 @@ class Slider(UIElement):
         self.value = current_value
         self.label = label
         self.resource_manager = resource_manager
-        self.font = resource_manager.get_scaled_font(24)
+        self.font_size = 24
         self.handle_rect = pygame.Rect(0, 0, 20, height)
         self.update_handle_position()
         self.is_dragging = False
@@ -70,6 +86,10 @@ class Slider(UIElement):
         self.handle_rect.x = handle_x
         self.handle_rect.y = self.rect.y
 
+    def hit_rect(self):
+        # The handle overhangs the track by half its width at either end
+        return self.rect.inflate(self.handle_rect.width, 0)
+
     def draw(self, surface):
         # Draw track
         pygame.draw.rect(surface, self.resource_manager.get_color('GRAY'), self.rect)
@@ -80,8 +100,11 @@ class Slider(UIElement):
         pygame.draw.rect(surface, self.resource_manager.get_color('BLACK'), self.handle_rect, 2)
         
         # Draw label and value
-        label_surface = self.font.render(f"{self.label}: {int(self.value)}", True, self.resource_manager.get_color('BLACK'))
-        surface.blit(label_surface, (self.rect.x, self.rect.y - 25))
+        label_surface = self.resource_manager.render_text(self.font_size, f"{self.label}: {int(self.value)}", self.resource_manager.get_color('BLACK'))
+        label_rect = surface.blit(label_surface, (self.rect.x, self.rect.y - 25))
+        
+        self.dirty = False
+        return self.rect.union(self.handle_rect).union(label_rect)
 
     def handle_event(self, event):
         if super().handle_event(event):
@@ -103,6 +126,7 @@ class Slider(UIElement):
             position_ratio = (handle_x - self.rect.x) / self.rect.width
             self.value = self.min_value + (value_range * position_ratio)
             self.update_handle_position()
+            self.dirty = True
             return True
         
         return False
@@ -115,9 +139,8 @@ class Dialog(UIElement):
         self.confirm_text = confirm_text
         self.cancel_text = cancel_text
         self.resource_manager = resource_manager
-        self.title_font = resource_manager.get_scaled_font(32)
-        self.message_font = resource_manager.get_scaled_font(24)
-        self.button_font = resource_manager.get_scaled_font(24)
+        self.title_font_size = 32
+        self.message_font_size = 24
         
         # Create buttons
         button_width = 120
@@ -143,9 +166,10 @@ class Dialog(UIElement):
             'RED',
             resource_manager
         )
+        self.confirm_button.parent = self
+        self.cancel_button.parent = self
         
-        self.start_time = pygame.time.get_ticks()
-        self.revert_time = 5000  # 5 seconds
+        self.revert_time = 5000  # 5 seconds; the game schedules the revert
 
     def draw(self, surface):
         # Draw background
@@ -153,38 +177,44 @@ class Dialog(UIElement):
         pygame.draw.rect(surface, self.resource_manager.get_color('BLACK'), self.rect, 2)
         
         # Draw title
-        title_surface = self.title_font.render(self.title, True, self.resource_manager.get_color('BLACK'))
+        title_surface = self.resource_manager.render_text(self.title_font_size, self.title, self.resource_manager.get_color('BLACK'))
         title_rect = title_surface.get_rect(centerx=self.rect.centerx, y=self.rect.y + 20)
         surface.blit(title_surface, title_rect)
         
         # Draw message
-        message_surface = self.message_font.render(self.message, True, self.resource_manager.get_color('BLACK'))
+        message_surface = self.resource_manager.render_text(self.message_font_size, self.message, self.resource_manager.get_color('BLACK'))
         message_rect = message_surface.get_rect(centerx=self.rect.centerx, y=self.rect.y + 80)
         surface.blit(message_surface, message_rect)
         
         # Draw buttons
         self.confirm_button.draw(surface)
         self.cancel_button.draw(surface)
+        
+        self.dirty = False
+        return self.rect.union(title_rect).union(message_rect)
 
     def handle_event(self, event):
+        result = None
         if self.confirm_button.handle_event(event):
-            return "confirm"
-        if self.cancel_button.handle_event(event):
-            return "cancel"
-        return None
-
-    def should_revert(self):
-        return pygame.time.get_ticks() - self.start_time > self.revert_time
+            result = "confirm"
+        elif self.cancel_button.handle_event(event):
+            result = "cancel"
+        if self.confirm_button.dirty or self.cancel_button.dirty:
+            self.dirty = True
+        return result
 
 class HealthBar(UIElement):
     def __init__(self, x, y, width, height, resource_manager):
         super().__init__(x, y, width, height)
         self.resource_manager = resource_manager
-        self.font = resource_manager.get_scaled_font(24)
+        self.font_size = 24
         self.health = 100
 
     def set_health(self, health):
-        self.health = max(0, min(100, health))
+        health = max(0, min(100, health))
+        if health != self.health:
+            self.health = health
+            self.dirty = True
 
     def draw(self, surface):
         # Draw background
@@ -200,6 +230,9 @@ class HealthBar(UIElement):
         
         # Draw text
         text = f"Health: {self.health}"
-        text_surface = self.font.render(text, True, self.resource_manager.get_color('WHITE'))
+        text_surface = self.resource_manager.render_text(self.font_size, text, self.resource_manager.get_color('WHITE'))
         text_rect = text_surface.get_rect(center=self.rect.center)
-        surface.blit(text_surface, text_rect) 
\ No newline at end of file
+        surface.blit(text_surface, text_rect)
+        
+        self.dirty = False
+        return self.rect.union(text_rect)
\ No newline at end of file
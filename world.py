@@ -1,221 +1,392 @@
 import pygame
 import random
-from config import GameConfig
+import warnings
+from config import get_config
 from resources import ResourceManager
-from entities import MovingObject, Tower, Projectile
+from entities import Tower
 from ui import HealthBar
+from spatial import EnemyIndex, OccupancyGrid
+from enemy_store import EnemyStore, HAS_NUMPY
+from clock import TickClock
+from pool import EntityPools
+from registry import EntityRegistry
+from profiler import FrameProfiler
+from replay import MOUSE_DOWN, MOUSE_UP, MOUSE_MOTION
+from scheduler import Scheduler
+
+class WorldLayout:
+    """Geometry of the world's static parts, computed once per resolution."""
+    def __init__(self, resources, width, height):
+        self.size = (width, height)
+        self.road_y, self.road_height = resources.get_road_dimensions(width, height)
+        self.road_rect = pygame.Rect(0, self.road_y, width, self.road_height)
+        self.shop_y, self.shop_height = resources.get_shop_dimensions(width, height)
+        self.shop_rect = pygame.Rect(0, self.shop_y, width, self.shop_height)
+        self.tower_size = resources.get_tower_size(width, height)
+        self.preview_rect = pygame.Rect(20, self.shop_y + (self.shop_height - self.tower_size) // 2,
+                                        self.tower_size, self.tower_size)
+
+class StaticLayers:
+    """The road and shop panel pre-rendered for one layout and tower cost."""
+    def __init__(self, resources, layout, tower_cost):
+        self.layout = layout
+        self.tower_cost = tower_cost
+        
+        # Road background and lane markings
+        self.road = create_layer(resources, layout.road_rect.size)
+        self.road.fill(resources.get_color('DARK_GRAY'))
+        line_spacing = 50
+        line_width = 10
+        line_height = layout.road_height // 2
+        for x in range(0, layout.road_rect.width, line_spacing):
+            line_rect = pygame.Rect(x, (layout.road_height - line_height) // 2,
+                                    line_width, line_height)
+            pygame.draw.rect(self.road, resources.get_color('WHITE'), line_rect)
+        
+        # Shop background, tower preview and cost
+        self.shop = create_layer(resources, layout.shop_rect.size)
+        self.shop.fill(resources.get_color('GRAY'))
+        preview_rect = layout.preview_rect.move(0, -layout.shop_y)
+        pygame.draw.rect(self.shop, resources.get_color('BLUE'), preview_rect)
+        pygame.draw.rect(self.shop, resources.get_color('BLACK'), preview_rect, 2)
+        cost_text = f"Cost: ${tower_cost}"
+        text_surface = resources.render_text(24, cost_text, resources.get_color('BLACK'))
+        text_rect = text_surface.get_rect(midleft=(preview_rect.right + 20, preview_rect.centery))
+        self.shop.blit(text_surface, text_rect)
+
+    def draw_road(self, surface):
+        surface.blit(self.road, self.layout.road_rect)
+
+    def draw_shop(self, surface):
+        surface.blit(self.shop, self.layout.shop_rect)
+
+    def restore_shop(self, surface, background, rects):
+        """Copy the shop back from background wherever rects overlap it."""
+        shop_rect = self.layout.shop_rect
+        for rect in rects:
+            overlap = rect.clip(shop_rect)
+            if overlap:
+                surface.blit(background, overlap, overlap)
+
+def create_layer(resources, size):
+    layer = resources.create_surface(size)
+    if pygame.display.get_surface() is not None:
+        layer = layer.convert()
+    return layer
+
+def create_health_bar(resources, layout):
+    x, y, width, height = resources.get_health_bar_dimensions(*layout.size)
+    return HealthBar(x, y, width, height, resources)
 
 class GameWorld:
-    def __init__(self):
-        self.config = GameConfig()
+    def __init__(self, enemy_storage=None, clock=None, rng=None, pools=None):
+        self.config = get_config()
         self.resources = ResourceManager()
+        self.pools = pools or EntityPools(self.resources)
+        self.tick_rate = self.config.tick_rate  # simulation steps per second
+        self.clock = clock or TickClock(1000 / self.tick_rate)
+        self.scheduler = Scheduler(self.clock)  # spawns and tower cooldowns run on sim time
+        self.rng = rng or random.Random()
+        self.tick = 0
+        self.loads = 0  # saves restored into this world
+        self.profiler = FrameProfiler()  # disabled; the game swaps in its own
+        self.recorder = None  # replay.ReplayWriter while a session is recorded
+        self.alpha = 1.0  # where drawing falls between the previous tick (0) and the current one (1)
         
         # Initialize game state
         self.health = self.config.starting_health
         self.balance = self.config.starting_balance
         self.towers = []
-        self.moving_objects = []
+        self.active_towers = {}  # placed towers that are ready or have projectiles in flight, in wake order
+        enemy_storage = enemy_storage or self.config.enemy_storage
+        self.array_enemies = enemy_storage == 'arrays'
+        if self.array_enemies and not HAS_NUMPY:
+            warnings.warn("enemy_storage is 'arrays' but numpy is not installed; using objects")
+            self.array_enemies = False
+        if self.array_enemies:
+            self.moving_objects = EnemyStore(self.resources)
+        else:
+            self.moving_objects = EntityRegistry()
+        self.enemy_index = EnemyIndex()
+        self.occupancy = None  # OccupancyGrid, built on first use
         self.selected_tower = None
         self.is_dragging = False
-        self.last_spawn_time = pygame.time.get_ticks()
+        self.last_spawn_time = self.clock.get_ticks()
+        self.spawn_timer = None
+        self.schedule_spawns()
         
-        # Initialize UI elements
-        self.initialize_ui()
+        # Static geometry and pre-rendered layers; layers and UI elements are
+        # built on first draw so headless runs never need fonts or surfaces
+        self.layout = WorldLayout(self.resources, self.config.world_width, self.config.world_height)
+        self.layers = None
+        self.health_bar = None
+        self.config.subscribe(self.on_config_changed)
         
         # Create initial moving objects
         self.create_moving_objects()
 
     def initialize_ui(self):
-        # Create health bar
-        x, y, width, height = self.resources.get_health_bar_dimensions(
-            self.config.window_width,
-            self.config.window_height
-        )
-        self.health_bar = HealthBar(x, y, width, height, self.resources)
+        self.health_bar = create_health_bar(self.resources, self.layout)
+
+    def on_config_changed(self, snapshot):
+        self.apply_config(snapshot)
+        self.reset_view()
+
+    def reset_view(self):
+        """Drop the layers and HUD drawn for the previous settings."""
+        self.layers = None  # tower cost may have changed too
+        if self.health_bar is not None:
+            self.initialize_ui()
+
+    def apply_config(self, snapshot):
+        """Update the simulation for new settings; the part of a change a SimulationWorker runs."""
+        # Re-layout for the new window geometry; a layout is replaced, never changed
+        if self.layout.size != (snapshot.world_width, snapshot.world_height):
+            self.layout = WorldLayout(self.resources, snapshot.world_width, snapshot.world_height)
+        if self.array_enemies:
+            self.moving_objects.update_geometry()
+        if self.spawn_timer is not None and self.spawn_timer.interval != snapshot.object_spawn_rate:
+            self.schedule_spawns()
+
+    def schedule_spawns(self):
+        """(Re)start the spawn wave timer, counting from the last wave."""
+        self.scheduler.cancel(self.spawn_timer)
+        rate = self.config.snapshot.object_spawn_rate
+        self.spawn_timer = self.scheduler.every(rate, self.spawn_wave, start=self.last_spawn_time + rate)
+
+    def stop_spawning(self):
+        self.scheduler.cancel(self.spawn_timer)
+        self.spawn_timer = None
+
+    def spawn_wave(self):
+        self.create_moving_objects()
+        self.last_spawn_time = self.clock.get_ticks()
 
     def create_moving_objects(self):
-        # Create moving objects with varying speeds
-        for _ in range(5):
-            speed = random.uniform(
-                self.config.object_speed * 0.8,
-                self.config.object_speed * 1.2
-            )
-            self.moving_objects.append(MovingObject(speed, self.resources))
+        # Create moving objects with varying speeds, in pixels per tick
+        object_speed = self.config.snapshot.object_speed / self.tick_rate
+        speeds = [
+            self.rng.uniform(object_speed * 0.8, object_speed * 1.2)
+            for _ in range(5)
+        ]
+        if self.array_enemies:
+            self.moving_objects.spawn(speeds)
+        else:
+            for speed in speeds:
+                enemy = self.pools.enemies.acquire()
+                enemy.reset(speed)
+                self.moving_objects.add(enemy)
 
     def update(self):
-        current_time = pygame.time.get_ticks()
+        self.clock.advance()
+        self.tick += 1
+        snapshot = self.config.snapshot
         
-        # Spawn new moving objects
-        if current_time - self.last_spawn_time >= self.config.object_spawn_rate:
-            self.create_moving_objects()
-            self.last_spawn_time = current_time
+        # Spawn waves and re-arm towers whose cooldown is over
+        self.scheduler.run_due()
         
         # Update moving objects
-        for obj in self.moving_objects[:]:
-            if obj.update():
-                self.health -= 1
-                self.health_bar.set_health(self.health)
-                if self.health <= 0:
-                    return True  # Game over
-            if obj.position >= self.config.window_width:
-                self.moving_objects.remove(obj)
+        with self.profiler.span('enemies'):
+            if self.array_enemies:
+                leaked = self.moving_objects.step(snapshot.world_width)
+                if leaked:
+                    self.health -= leaked
+                    if self.health <= 0:
+                        return True  # Game over
+                self.enemy_index.rebuild_from_store(self.moving_objects)
+            else:
+                for obj in self.moving_objects:
+                    if obj.update():
+                        self.health -= 1
+                        if self.health <= 0:
+                            return True  # Game over
+                    if obj.position >= snapshot.world_width:
+                        self.moving_objects.remove(obj)
+                self.enemy_index.rebuild(self.moving_objects)
         
         # Update towers and their projectiles
-        for tower in self.towers:
-            tower.update(self.moving_objects)
+        profiler = self.profiler
+        with profiler.phase('towers'):
+            # Only active towers; reloading towers with nothing in flight cost nothing.
+            # A tower may leave the dict during its update, so iterate over a copy.
+            if profiler.tracer is None:
+                for tower in list(self.active_towers):
+                    tower.update(self.moving_objects, self.enemy_index)
+            else:
+                for tower in list(self.active_towers):
+                    with profiler.span('tower', x=tower.rect.centerx, y=tower.rect.centery):
+                        tower.update(self.moving_objects, self.enemy_index)
+        
+        # Destroy everything that died or leaked this tick in one pass
+        if not self.array_enemies:
+            for enemy in self.moving_objects.flush():
+                self.pools.enemies.release(enemy)
         
         return False  # Game not over
 
     def draw(self, surface):
+        profiler = self.profiler
+        
         # Draw road first (background)
+        with profiler.span('road'):
+            self.draw_road(surface)
+        
+        with profiler.span('entities'):
+            self.draw_entities(surface)
+        
+        # Draw shop last (foreground)
+        with profiler.span('shop'):
+            self.draw_shop(surface)
+        
+        with profiler.span('hud'):
+            self.draw_hud(surface)
+
+    def draw_static(self, surface):
+        """Draw the layers that don't change between frames: road and shop."""
         self.draw_road(surface)
+        self.draw_shop(surface)
+
+    def draw_dynamic(self, surface, background):
+        """Draw everything drawn over the static layers and return the Rects covered.
+
+        background must hold the static layers; the shop is restored from it
+        wherever an entity overlapped it, so the shop stays in the foreground.
+        """
+        profiler = self.profiler
+        with profiler.span('entities'):
+            rects = self.draw_entities(surface)
+        
+        with profiler.span('shop'):
+            self.static_layers().restore_shop(surface, background, rects)
+        
+        with profiler.span('hud'):
+            return rects + self.draw_hud(surface)
+
+    def draw_entities(self, surface):
+        rects = []
+        # Moving things are drawn interpolated between the last two ticks
+        lag = 1.0 - self.alpha
         
         # Draw moving objects
-        for obj in self.moving_objects:
-            obj.draw(surface)
+        if self.array_enemies:
+            rects.extend(self.moving_objects.draw(surface, lag))
+        else:
+            for obj in self.moving_objects:
+                rects.append(obj.draw(surface, lag))
         
         # Draw towers and their projectiles
         for tower in self.towers:
-            tower.draw(surface)
+            rects.extend(tower.draw(surface, lag))
         
         # Draw selected tower preview if dragging
         if self.selected_tower:
-            self.selected_tower.draw(surface)
-        
-        # Draw shop last (foreground)
-        self.draw_shop(surface)
-        
+            rects.extend(self.selected_tower.draw(surface))
+        return rects
+
+    def draw_hud(self, surface):
+        """Draw the balance and health bar; return the Rects covered."""
         # Draw balance
-        self.draw_balance(surface)
+        rects = [self.draw_balance(surface, self.balance)]
         
         # Draw health bar
-        self.health_bar.draw(surface)
+        if self.health_bar is None:
+            self.initialize_ui()
+        self.health_bar.set_health(self.health)
+        rects.append(self.health_bar.draw(surface))
+        return rects
+
+    def static_layers(self):
+        """The road and shop layers for the current layout, built on first use."""
+        layers = self.layers
+        if layers is None or layers.layout is not self.layout:
+            layers = self.layers = StaticLayers(self.resources, self.layout, self.config.tower_cost)
+        return layers
 
     def draw_road(self, surface):
-        road_y, road_height = self.resources.get_road_dimensions(
-            self.config.window_width,
-            self.config.window_height
-        )
-        
-        # Draw road background
-        road_rect = pygame.Rect(0, road_y, self.config.window_width, road_height)
-        pygame.draw.rect(surface, self.resources.get_color('DARK_GRAY'), road_rect)
-        
-        # Draw road lines
-        line_spacing = 50
-        line_width = 10
-        line_height = road_height // 2
-        
-        for x in range(0, self.config.window_width, line_spacing):
-            line_rect = pygame.Rect(x, road_y + (road_height - line_height) // 2,
-                                  line_width, line_height)
-            pygame.draw.rect(surface, self.resources.get_color('WHITE'), line_rect)
+        self.static_layers().draw_road(surface)
 
     def draw_shop(self, surface):
-        shop_y, shop_height = self.resources.get_shop_dimensions(
-            self.config.window_width,
-            self.config.window_height
-        )
-        
-        # Draw shop background
-        shop_rect = pygame.Rect(0, shop_y, self.config.window_width, shop_height)
-        pygame.draw.rect(surface, self.resources.get_color('GRAY'), shop_rect)
-        
-        # Draw tower preview
-        tower_size = self.resources.get_tower_size(
-            self.config.window_width,
-            self.config.window_height
-        )
-        preview_rect = pygame.Rect(20, shop_y + (shop_height - tower_size) // 2,
-                                 tower_size, tower_size)
-        pygame.draw.rect(surface, self.resources.get_color('BLUE'), preview_rect)
-        pygame.draw.rect(surface, self.resources.get_color('BLACK'), preview_rect, 2)
-        
-        # Draw tower cost
-        cost_text = f"Cost: ${self.config.tower_cost}"
-        font = self.resources.get_scaled_font(24)
-        text_surface = font.render(cost_text, True, self.resources.get_color('BLACK'))
-        text_rect = text_surface.get_rect(midleft=(preview_rect.right + 20, preview_rect.centery))
-        surface.blit(text_surface, text_rect)
+        self.static_layers().draw_shop(surface)
 
-    def draw_balance(self, surface):
-        font = self.resources.get_scaled_font(24)
-        text = f"Balance: {self.balance}"
-        text_surface = font.render(text, True, self.resources.get_color('BLACK'))
-        surface.blit(text_surface, (self.config.window_width - 150, 20))
+    def draw_balance(self, surface, balance):
+        text = f"Balance: {balance}"
+        text_surface = self.resources.render_text(24, text, self.resources.get_color('BLACK'))
+        return surface.blit(text_surface, (self.config.world_width - 150, 20))
 
     def handle_mouse_down(self, event):
+        if self.recorder is not None:
+            self.recorder.record(MOUSE_DOWN, self.tick, event)
         if event.button == 1:  # Left click
             # Check if clicking in shop area
-            shop_y, shop_height = self.resources.get_shop_dimensions(
-                self.config.window_width,
-                self.config.window_height
-            )
-            if shop_y <= event.pos[1] <= shop_y + shop_height:
+            layout = self.layout
+            if layout.shop_y <= event.pos[1] <= layout.shop_y + layout.shop_height:
                 # Check if clicking on tower preview
-                tower_size = self.resources.get_tower_size(
-                    self.config.window_width,
-                    self.config.window_height
-                )
-                preview_rect = pygame.Rect(20, shop_y + (shop_height - tower_size) // 2,
-                                         tower_size, tower_size)
-                if preview_rect.collidepoint(event.pos):
+                if layout.preview_rect.collidepoint(event.pos):
                     if self.balance >= self.config.tower_cost:
                         # Create tower at current mouse position
-                        self.selected_tower = Tower(event.pos[0], event.pos[1], self.resources)
+                        self.selected_tower = self.create_tower(event.pos)
                         self.is_dragging = True
                         return
             
-            # Check if clicking on existing towers
-            for tower in self.towers:
-                if tower.rect.collidepoint(event.pos):
-                    tower.selected = not tower.selected
-                    return
+            # Check if clicking on an existing tower
+            tower = self.occupancy_grid().tower_at(event.pos)
+            if tower is not None:
+                tower.selected = not tower.selected
+
+    def occupancy_grid(self):
+        """The OccupancyGrid for the current layout, with every placed tower in it."""
+        grid = self.occupancy
+        if grid is None or grid.layout is not self.layout or grid.towers is not self.towers:
+            grid = self.occupancy = OccupancyGrid(self.layout, self.towers)
+        else:
+            grid.sync()
+        return grid
 
     def is_valid_tower_placement(self, pos):
-        """Check if a tower can be placed at the given position."""
-        road_y, road_height = self.resources.get_road_dimensions(
-            self.config.window_width,
-            self.config.window_height
-        )
-        
-        # Check if position is NOT on the road
-        if road_y <= pos[1] <= road_y + road_height:
-            return False
-            
-        # Check if position is within screen bounds
-        tower_size = self.resources.get_tower_size(
-            self.config.window_width,
-            self.config.window_height
-        )
-        if not (tower_size//2 <= pos[0] <= self.config.window_width - tower_size//2):
-            return False
-            
-        # Check for overlap with existing towers
-        for tower in self.towers:
-            if abs(tower.rect.centerx - pos[0]) < tower_size and \
-               abs(tower.rect.centery - pos[1]) < tower_size:
-                return False
-                
-        return True
+        """Check if a tower can be placed at the given position.
+
+        Off the road, inside the world with the whole tower on screen
+        horizontally, and clear of every placed tower.
+        """
+        return self.occupancy_grid().is_free(pos)
+
+    def create_tower(self, pos):
+        return Tower(pos[0], pos[1], self.resources, self.clock, self.pools, self.scheduler)
+
+    def add_tower(self, tower):
+        """Add tower to the world, free of charge; towers are only updated once added."""
+        self.towers.append(tower)
+        tower.active = self.active_towers
+        if not tower.is_idle():
+            tower.wake()
+
+    def place_tower(self, pos, tower=None):
+        """Buy a tower at pos if affordable and the spot is valid; return it, or None."""
+        if self.balance < self.config.tower_cost or not self.is_valid_tower_placement(pos):
+            return None
+        if tower is None:
+            tower = self.create_tower(pos)
+        tower.rect.center = pos
+        self.add_tower(tower)
+        # Deduct the cost from balance
+        self.balance -= self.config.tower_cost
+        return tower
 
     def handle_mouse_up(self, event):
+        if self.recorder is not None:
+            self.recorder.record(MOUSE_UP, self.tick, event)
         if event.button == 1 and self.is_dragging and self.selected_tower:
-            # Check if tower placement is valid
-            if self.is_valid_tower_placement(event.pos):
-                # Place tower
-                self.selected_tower.rect.center = event.pos
-                self.towers.append(self.selected_tower)
-                # Deduct the cost from balance
-                self.balance -= self.config.tower_cost
-            else:
-                # Invalid placement, don't place the tower
+            # Place the tower if the placement is valid, otherwise drop it
+            if self.place_tower(event.pos, self.selected_tower) is None:
                 self.selected_tower = None
             
             self.is_dragging = False
 
     def handle_mouse_motion(self, event):
         if self.is_dragging and self.selected_tower:
+            # Motion only matters while dragging, so only then is it recorded
+            if self.recorder is not None:
+                self.recorder.record(MOUSE_MOTION, self.tick, event)
             # Update tower position
             self.selected_tower.rect.center = event.pos
             
@@ -226,4 +397,17 @@ class GameWorld:
                 self.selected_tower.color = self.resources.get_color('RED')
 
     def is_game_over(self):
-        return self.health <= 0 
\ No newline at end of file
+        return self.health <= 0
+
+    def state_summary(self):
+        """Return a plain dict describing the simulation state."""
+        return {
+            'tick': self.tick,
+            'time_ms': self.clock.get_ticks(),
+            'health': self.health,
+            'balance': self.balance,
+            'enemies': len(self.moving_objects),
+            'towers': len(self.towers),
+            'projectiles': sum(len(tower.projectiles) for tower in self.towers),
+            'game_over': self.is_game_over()
+        } 
\ No newline at end of file